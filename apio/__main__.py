@@ -21,13 +21,13 @@ class ApioCLI(click.MultiCommand):
             if filename.startswith('__init__'):
                 continue
             if filename.endswith('.py'):
-                rv.append(filename[:-3])
+                rv.append(filename[:-3].replace('_', '-'))
         rv.sort()
         return rv
 
     def get_command(self, ctx, name):
         ns = {}
-        fn = join(commands_folder, name + '.py')
+        fn = join(commands_folder, name.replace('-', '_') + '.py')
         if isfile(fn):
             with open(fn) as f:
                 code = compile(f.read(), fn, 'exec')
@@ -46,8 +46,9 @@ def cli(ctx):
     # Update help structure
     if ctx.invoked_subcommand is None:
         env_help = []
-        env_commands = ['boards', 'config', 'drivers', 'examples', 'init',
-                        'install', 'system', 'uninstall', 'upgrade']
+        env_commands = ['boards', 'cache', 'cache-server', 'config',
+                        'drivers', 'env', 'examples', 'init', 'install',
+                        'system', 'uninstall', 'upgrade']
 
         help = ctx.get_help()
         help = help.split('\n')
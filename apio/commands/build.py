@@ -19,6 +19,19 @@ except NameError:  # pragma: no cover
 @click.pass_context
 @click.option('--board', type=unicode, metavar='board',
               help='Set the board')
+@click.option('--boards', type=unicode, metavar='board,...',
+              help='Build for several boards in parallel.')
+@click.option('--seeds', type=int, metavar='seeds',
+              help='Explore several place and route seeds in parallel.')
+@click.option('--pnr-opts', type=unicode, metavar='options', multiple=True,
+              help='Set of arachne-pnr options explored with --seeds.')
+@click.option('--stage', type=click.Choice(['synth', 'pnr', 'pack']),
+              help='Run the build up to the given stage.')
+@click.option('--estimate', is_flag=True,
+              help='Check that the design fits the FPGA before the place '
+                   'and route.')
+@click.option('-j', '--jobs', type=int, metavar='jobs',
+              help='Set the number of parallel builds.')
 @click.option('--fpga', type=unicode, metavar='fpga',
               help='Set the FPGA')
 @click.option('--size', type=unicode, metavar='size',
@@ -27,16 +40,67 @@ except NameError:  # pragma: no cover
               help='Set the FPGA type (hx/lp)')
 @click.option('--pack', type=unicode, metavar='package',
               help='Set the FPGA package')
-def cli(ctx, board, fpga, pack, type, size):
+@click.option('-p', '--profile', type=unicode, metavar='profile',
+              help='Set the effort profile: fast, default or quality.')
+@click.option('--build-dir', type=unicode, metavar='path',
+              help='Write the artifacts out of tree, in path/<fpga>.')
+@click.option('-q', '--quiet', is_flag=True,
+              help='Show only warnings and errors.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+@click.option('--stats', is_flag=True,
+              help='Show the time and memory used by every stage.')
+@click.option('--format', type=click.Choice(['text', 'jsonl']),
+              default='text',
+              help='Set the output format: text or jsonl (json lines).')
+def cli(ctx, board, boards, seeds, pnr_opts, stage, estimate, jobs, fpga, pack,
+        type, size, profile, build_dir, quiet, timeout, stats, format):
     """Synthesize the bitstream."""
 
+    if stage and (boards or seeds):
+        click.secho('Error: --stage can not be used with --boards or --seeds',
+                    fg='red')
+        ctx.exit(1)
+
+    if format == 'jsonl' and (boards or seeds):
+        click.secho('Error: --format jsonl can not be used with --boards or '
+                    '--seeds', fg='red')
+        ctx.exit(1)
+
+    if boards:
+        if board or fpga or pack or type or size:
+            click.secho(
+                'Error: --boards can not be used with --board, --fpga, '
+                '--size, --type or --pack', fg='red')
+            ctx.exit(1)
+        exit_code = SCons().build_matrix({
+            'boards': boards,
+            'jobs': jobs,
+            'profile': profile,
+            'build_dir': build_dir,
+            'timeout': timeout
+        })
+        ctx.exit(exit_code)
+
     # Run scons
     exit_code = SCons().build({
         'board': board,
         'fpga': fpga,
         'size': size,
         'type': type,
-        'pack': pack
+        'pack': pack,
+        'profile': profile,
+        'build_dir': build_dir,
+        'seeds': seeds,
+        'stage': stage,
+        'estimate': estimate,
+        'pnr_opts': pnr_opts,
+        'jobs': jobs,
+        'quiet': quiet,
+        'timeout': timeout,
+        'stats': stats,
+        'format': format
     })
     ctx.exit(exit_code)
 
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.cache import BuildCache
+
+
+@click.command('cache')
+@click.pass_context
+@click.option('-s', '--stats', is_flag=True,
+              help='Show the build cache statistics.')
+@click.option('-c', '--clean', is_flag=True,
+              help='Remove all the cached artifacts.')
+def cli(ctx, stats, clean):
+    """Manage the build cache."""
+
+    if stats:
+        BuildCache().list_stats()
+    elif clean:
+        BuildCache().clean()
+    else:
+        click.secho(ctx.get_help())
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.cacheserver import CacheServer, DEFAULT_MAX_UPLOAD
+
+# Python3 compat
+try:
+    unicode = str
+except NameError:  # pragma: no cover
+    pass
+
+
+@click.command('cache-server')
+@click.pass_context
+@click.option('-d', '--dir', type=unicode, metavar='path', required=True,
+              help='Set the directory of the cached artifacts.')
+@click.option('-s', '--size', type=float, metavar='MB', default=10240,
+              help='Set the disk quota in MB.')
+@click.option('-h', '--host', type=unicode, metavar='host',
+              default='127.0.0.1', help='Set the listening address.')
+@click.option('-p', '--port', type=int, metavar='port', default=8080,
+              help='Set the listening port.')
+@click.option('-m', '--max-upload', type=float, metavar='MB',
+              default=DEFAULT_MAX_UPLOAD,
+              help='Set the largest upload in MB.')
+def cli(ctx, dir, size, host, port, max_upload):
+    """Run a build cache server."""
+
+    CacheServer(dir, size, host, port, max_upload).run()
@@ -18,7 +18,13 @@ from apio.profile import Profile
 @click.option('-e', '--exe', type=click.Choice(['default', 'native']),
               help='Configure executables: `default` selects apio packages, ' +
                    '`native` selects system binaries.')
-def cli(ctx, list, verbose, exe):
+@click.option('-s', '--scons', type=click.Choice(['subprocess', 'inprocess']),
+              help='Run scons: `subprocess` starts a python interpreter, ' +
+                   '`inprocess` runs it in a fork of apio.')
+@click.option('-H', '--history', type=click.Choice(['on', 'off']),
+              help='Record the builds and their stages stats in the build ' +
+                   'history.')
+def cli(ctx, list, verbose, exe, scons, history):
     """Apio configuration."""
 
     if list:  # pragma: no cover
@@ -30,5 +36,11 @@ def cli(ctx, list, verbose, exe):
     elif exe:  # pragma: no cover
         profile = Profile()
         profile.add_config('exe', exe)
+    elif scons:  # pragma: no cover
+        profile = Profile()
+        profile.add_config('scons', scons)
+    elif history:  # pragma: no cover
+        profile = Profile()
+        profile.add_config('history', history)
     else:
         click.secho(ctx.get_help())
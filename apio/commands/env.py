@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.toolchain import Toolchain
+
+
+@click.command('env')
+@click.pass_context
+@click.option('-l', '--list', is_flag=True,
+              help='List the resolved toolchain environment.')
+@click.option('-s', '--shell', is_flag=True,
+              help='Print the shell commands that load the environment.')
+@click.option('-u', '--update', is_flag=True,
+              help='Resolve again the toolchain environment.')
+def cli(ctx, list, shell, update):
+    """Toolchain environment."""
+
+    if update:
+        toolchain = Toolchain()
+        toolchain.update()
+        click.secho('Toolchain environment updated', fg='green')
+    elif list:
+        Toolchain().list()
+    elif shell:
+        click.echo('\n'.join(Toolchain().shell_script()))
+    else:
+        click.secho(ctx.get_help())
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.scons import SCons
+
+# Python3 compat
+try:
+    unicode = str
+except NameError:  # pragma: no cover
+    pass
+
+
+@click.command('estimate')
+@click.pass_context
+@click.option('--board', type=unicode, metavar='board',
+              help='Set the board')
+@click.option('--fpga', type=unicode, metavar='fpga',
+              help='Set the FPGA')
+@click.option('--size', type=unicode, metavar='size',
+              help='Set the FPGA type (1k/8k)')
+@click.option('--type', type=unicode, metavar='type',
+              help='Set the FPGA type (hx/lp)')
+@click.option('--pack', type=unicode, metavar='package',
+              help='Set the FPGA package')
+@click.option('-p', '--profile', type=unicode, metavar='profile',
+              help='Set the effort profile: fast, default or quality.')
+@click.option('--build-dir', type=unicode, metavar='path',
+              help='Write the artifacts out of tree, in path/<fpga>.')
+@click.option('-q', '--quiet', is_flag=True,
+              help='Show only warnings and errors.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+@click.option('--stats', is_flag=True,
+              help='Show the time and memory used by every stage.')
+def cli(ctx, board, fpga, pack, type, size, profile, build_dir, quiet,
+        timeout, stats):
+    """Check that the design fits the FPGA."""
+
+    # Run scons
+    exit_code = SCons().estimate({
+        'board': board,
+        'fpga': fpga,
+        'size': size,
+        'type': type,
+        'pack': pack,
+        'profile': profile,
+        'build_dir': build_dir,
+        'quiet': quiet,
+        'timeout': timeout,
+        'stats': stats
+    })
+    ctx.exit(exit_code)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.scons import SCons
+
+# Python3 compat
+try:
+    unicode = str
+except NameError:  # pragma: no cover
+    pass
+
+
+@click.command('run')
+@click.pass_context
+@click.argument('targets', nargs=-1, required=True,
+                type=click.Choice(['build', 'time', 'verify', 'sim']))
+@click.option('--board', type=unicode, metavar='board',
+              help='Set the board')
+@click.option('--fpga', type=unicode, metavar='fpga',
+              help='Set the FPGA')
+@click.option('--size', type=unicode, metavar='size',
+              help='Set the FPGA type (1k/8k)')
+@click.option('--type', type=unicode, metavar='type',
+              help='Set the FPGA type (hx/lp)')
+@click.option('--pack', type=unicode, metavar='package',
+              help='Set the FPGA package')
+@click.option('-p', '--profile', type=unicode, metavar='profile',
+              help='Set the effort profile: fast, default or quality.')
+@click.option('--build-dir', type=unicode, metavar='path',
+              help='Write the artifacts out of tree, in path/<fpga>.')
+@click.option('-j', '--jobs', type=int, metavar='jobs',
+              help='Set the number of parallel stages.')
+@click.option('-q', '--quiet', is_flag=True,
+              help='Show only warnings and errors.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+@click.option('--stats', is_flag=True,
+              help='Show the time and memory used by every stage.')
+def cli(ctx, targets, board, fpga, pack, type, size, profile, build_dir,
+        jobs, quiet, timeout, stats):
+    """Run several targets in a single build."""
+
+    exit_code = SCons().run_targets({
+        'targets': targets,
+        'board': board,
+        'fpga': fpga,
+        'size': size,
+        'type': type,
+        'pack': pack,
+        'profile': profile,
+        'build_dir': build_dir,
+        'jobs': jobs,
+        'quiet': quiet,
+        'timeout': timeout,
+        'stats': stats
+    })
+    ctx.exit(exit_code)
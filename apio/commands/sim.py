@@ -8,11 +8,32 @@ import click
 
 from apio.managers.scons import SCons
 
+# Python3 compat
+try:
+    unicode = str
+except NameError:  # pragma: no cover
+    pass
+
 
 @click.command('sim')
 @click.pass_context
-def cli(ctx):
+@click.option('-q', '--quiet', is_flag=True,
+              help='Show only warnings and errors.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+@click.option('--stats', is_flag=True,
+              help='Show the time and memory used by every stage.')
+@click.option('--format', type=click.Choice(['text', 'jsonl']),
+              default='text',
+              help='Set the output format: text or jsonl (json lines).')
+def cli(ctx, quiet, timeout, stats, format):
     """Launch the verilog simulation."""
 
-    exit_code = SCons().sim()
+    exit_code = SCons().sim({
+        'quiet': quiet,
+        'timeout': timeout,
+        'stats': stats,
+        'format': format
+    })
     ctx.exit(exit_code)
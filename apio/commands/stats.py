@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio import util
+from apio.profile import Profile
+from apio.managers.stats import BuildHistory
+
+
+@click.command('stats')
+@click.pass_context
+@click.option('-n', '--limit', type=int, metavar='builds', default=10,
+              help='Set the number of builds listed.')
+@click.option('-w', '--window', type=int, metavar='builds', default=10,
+              help='Set the number of builds of the baseline.')
+@click.option('-t', '--threshold', type=float, metavar='percent',
+              default=25, help='Set the slowdown reported as regression.')
+def cli(ctx, limit, window, threshold):
+    """Show the build history and performance regressions."""
+
+    if not Profile().check_history():
+        click.secho('Info: the build history is disabled, enable it with '
+                    '`apio config --history on`')
+    regressions = BuildHistory().show(
+        util.get_project_dir(), limit, window, threshold)
+    ctx.exit(1 if regressions else 0)
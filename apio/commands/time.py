@@ -27,15 +27,44 @@ except NameError:  # pragma: no cover
               help='Set the FPGA type (hx/lp)')
 @click.option('--pack', type=unicode, metavar='package',
               help='Set the FPGA package')
-def cli(ctx, board, fpga, pack, type, size):
+@click.option('-p', '--profile', type=unicode, metavar='profile',
+              help='Set the effort profile: fast, default or quality.')
+@click.option('--build-dir', type=unicode, metavar='path',
+              help='Write the artifacts out of tree, in path/<fpga>.')
+@click.option('-q', '--quiet', is_flag=True,
+              help='Show only warnings and errors.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+@click.option('--stats', is_flag=True,
+              help='Show the time and memory used by every stage.')
+@click.option('--format', type=click.Choice(['text', 'jsonl']),
+              default='text',
+              help='Set the output format: text or jsonl (json lines).')
+@click.option('--json', is_flag=True,
+              help='Write the build report to stdout, in json.')
+def cli(ctx, board, fpga, pack, type, size, profile, build_dir, quiet, timeout,
+        stats, format, json):
     """Bitstream timing analysis."""
 
+    if json and format == 'jsonl':
+        click.secho('Error: --json can not be used with --format jsonl',
+                    fg='red')
+        ctx.exit(1)
+
     # Run scons
     exit_code = SCons().time({
         'board': board,
         'fpga': fpga,
         'size': size,
         'type': type,
-        'pack': pack
+        'pack': pack,
+        'profile': profile,
+        'build_dir': build_dir,
+        'quiet': quiet,
+        'timeout': timeout,
+        'stats': stats,
+        'format': format,
+        'json': json
     })
     ctx.exit(exit_code)
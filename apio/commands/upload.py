@@ -29,7 +29,22 @@ except NameError:  # pragma: no cover
               help='Set the FPGA type (hx/lp)')
 @click.option('--pack', type=unicode, metavar='package',
               help='Set the FPGA package')
-def cli(ctx, device, board, fpga, pack, type, size):
+@click.option('-p', '--profile', type=unicode, metavar='profile',
+              help='Set the effort profile: fast, default or quality.')
+@click.option('--build-dir', type=unicode, metavar='path',
+              help='Write the artifacts out of tree, in path/<fpga>.')
+@click.option('-q', '--quiet', is_flag=True,
+              help='Show only warnings and errors.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+@click.option('--stats', is_flag=True,
+              help='Show the time and memory used by every stage.')
+@click.option('--format', type=click.Choice(['text', 'jsonl']),
+              default='text',
+              help='Set the output format: text or jsonl (json lines).')
+def cli(ctx, device, board, fpga, pack, type, size, profile, build_dir, quiet,
+        timeout, stats, format):
     """Upload the bitstream to the FPGA."""
 
     # Run scons
@@ -38,7 +53,13 @@ def cli(ctx, device, board, fpga, pack, type, size):
         'fpga': fpga,
         'size': size,
         'type': type,
-        'pack': pack
+        'pack': pack,
+        'profile': profile,
+        'build_dir': build_dir,
+        'quiet': quiet,
+        'timeout': timeout,
+        'stats': stats,
+        'format': format
     }, device)
     ctx.exit(exit_code)
 
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.watcher import Watch
+
+# Python3 compat
+try:
+    unicode = str
+except NameError:  # pragma: no cover
+    pass
+
+
+@click.command('watch')
+@click.pass_context
+@click.argument('target', type=click.Choice(['build', 'sim', 'verify']))
+@click.option('--board', type=unicode, metavar='board',
+              help='Set the board')
+@click.option('--fpga', type=unicode, metavar='fpga',
+              help='Set the FPGA')
+@click.option('--size', type=unicode, metavar='size',
+              help='Set the FPGA type (1k/8k)')
+@click.option('--type', type=unicode, metavar='type',
+              help='Set the FPGA type (hx/lp)')
+@click.option('--pack', type=unicode, metavar='package',
+              help='Set the FPGA package')
+@click.option('-p', '--profile', type=unicode, metavar='profile',
+              help='Set the effort profile: fast, default or quality.')
+@click.option('--build-dir', type=unicode, metavar='path',
+              help='Write the artifacts out of tree, in path/<fpga>.')
+@click.option('-v', '--verbose', is_flag=True,
+              help='Show the complete output of the tools.')
+@click.option('--delay', type=float, default=0.3, metavar='seconds',
+              help='Wait for more changes before running the target.')
+@click.option('--timeout', type=unicode, metavar='[stage=]seconds',
+              multiple=True,
+              help='Kill the command, or a stage, after the given seconds.')
+def cli(ctx, target, board, fpga, pack, type, size, profile, build_dir,
+        verbose, delay, timeout):
+    """Run a target every time the sources change."""
+
+    exit_code = Watch(target, {
+        'board': board,
+        'fpga': fpga,
+        'size': size,
+        'type': type,
+        'pack': pack,
+        'profile': profile,
+        'build_dir': build_dir,
+        'quiet': not verbose,
+        'timeout': timeout
+    }, delay).run()
+    ctx.exit(exit_code)
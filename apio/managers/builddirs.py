@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import json
+
+from os.path import isdir, isfile, join, normpath, relpath
+
+from apio import util
+from apio.managers.project import Project
+
+# -- Build root, relative to the project dir
+BUILD_DIR = 'build'
+
+# -- Out of tree build dirs generated by apio, removed by clean
+BUILD_DIRS_FILENAME = join('.apio', 'build_dirs.json')
+
+
+def get_build_dirs():
+    """Out of tree build dirs generated by apio in the project, relative
+       to it or absolute"""
+    path = join(util.get_project_dir(), BUILD_DIRS_FILENAME)
+    if not isfile(path):
+        return []
+    with open(path, 'r') as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return []
+
+
+def add_build_dir(build_dir):
+    """Record an out of tree build dir, so that clean removes it"""
+    project_dir = util.get_project_dir()
+    build_dir = normpath(join(project_dir, build_dir))
+    if not removable(build_dir, project_dir):
+        return
+    if build_dir.startswith(project_dir + os.sep):
+        build_dir = relpath(build_dir, project_dir)
+    build_dirs = get_build_dirs()
+    if build_dir in build_dirs:
+        return
+    if not isdir(join(project_dir, '.apio')):
+        os.makedirs(join(project_dir, '.apio'))
+    with open(join(project_dir, BUILD_DIRS_FILENAME), 'w') as f:
+        json.dump(build_dirs + [build_dir], f)
+
+
+def get_artifact_dirs():
+    """Absolute paths of the dirs that only hold build artifacts: the
+       build root, set with the apio.ini `build_dir` option, and the
+       recorded build dirs"""
+    project_dir = util.get_project_dir()
+    root = Project().get_option('build_dir', BUILD_DIR)
+    return set(normpath(join(project_dir, build_dir))
+               for build_dir in [root] + get_build_dirs()
+               if removable(normpath(join(project_dir, build_dir)),
+                            project_dir))
+
+
+def removable(build_dir, project_dir):
+    """The build dir is not the project dir or one of its parents"""
+    return build_dir != project_dir and \
+        not project_dir.startswith(build_dir.rstrip(os.sep) + os.sep)
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import re
+import json
+import click
+import shutil
+import hashlib
+import requests
+
+from multiprocessing.pool import ThreadPool
+from os.path import isdir, isfile, join, getsize, getmtime, relpath, dirname, \
+    basename, normpath
+
+from apio import util
+
+STATS_FILENAME = 'stats.json'
+
+# -- Files that are inputs of the build
+SOURCES_EXTENSIONS = ('.v', '.vh', '.pcf')
+
+# -- Cache entry: <prefix>/<signature>
+ENTRY_RE = re.compile(r'^[0-9A-Za-z]{1,4}/[0-9A-Za-z]{8,}$')
+
+# -- Cache size in MB
+DEFAULT_CACHE_SIZE = 1024
+
+# -- Lines written by scons --cache-debug
+RETRIEVE_RE = re.compile(r'^CacheRetrieve\((?P<node>.*?)\):\s+retrieving '
+                         r'from (?P<path>.*)$')
+MISS_RE = re.compile(r'^CacheRetrieve\((?P<node>.*?)\):\s+.* not in cache$')
+PUSH_RE = re.compile(r'^CachePush\((?P<node>.*?)\):\s+pushing '
+                     r'to (?P<path>.*)$')
+
+
+class BuildCache(object):
+    """Content-addressed cache of the build artifacts (.blif, .asc, .bin,
+       .rpt), shared by all the projects. Artifacts are stored by scons
+       under their build signature: a hash of the sources contents, the
+       pcf, the FPGA variables, the tools options and the toolchain
+       versions. Apio bounds its size evicting the least recently used
+       entries and keeps the hit/miss statistics"""
+
+    def __init__(self, cache_dir=None, max_size=None):
+        self.cache_dir = cache_dir or util._get_projconf_option_dir(
+            'cache_dir', join(util.get_home_dir(), 'cache'))
+        if max_size is None:
+            max_size = util._get_projconf_option_dir(
+                'cache_size', DEFAULT_CACHE_SIZE)
+        try:
+            self.max_size = int(float(max_size) * 1024 * 1024)
+        except ValueError:
+            self.max_size = DEFAULT_CACHE_SIZE * 1024 * 1024
+        self.used = []
+        self._stats_path = join(self.cache_dir, STATS_FILENAME)
+
+    @property
+    def enabled(self):
+        return bool(self.cache_dir) and self.max_size > 0
+
+    def scons_variables(self, debug_path):
+        """Scons arguments that enable the cache"""
+        if not self.enabled:
+            return []
+        if not isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        return ['cache_dir={}'.format(self.cache_dir),
+                '--cache-debug={}'.format(debug_path)]
+
+    def update(self, debug_path):
+        """Account the cache accesses of a build and evict the least
+           recently used entries. Returns (hits, misses)"""
+        hits, misses, pushed = [], [], []
+        if isfile(debug_path):
+            with open(debug_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    match = RETRIEVE_RE.match(line)
+                    if match:
+                        hits.append(match.group('path'))
+                        continue
+                    match = PUSH_RE.match(line)
+                    if match:
+                        pushed.append(match.group('path'))
+                        continue
+                    if MISS_RE.match(line):
+                        misses.append(line)
+            os.remove(debug_path)
+
+        # -- Depending on its version, scons logs the path of the entries
+        #    or only their signature
+        index = dict((basename(path), path) for path, _, _ in self._entries())
+        hits = [index.get(basename(path), path) for path in hits]
+        pushed = [index.get(basename(path), path) for path in pushed]
+
+        # -- Mark the retrieved entries as recently used
+        for path in hits:
+            if isfile(path):
+                os.utime(path, None)
+
+        # -- Entries of this build, relative to the cache dir
+        self.used = [relpath(path, self.cache_dir).replace(os.sep, '/')
+                     for path in hits + pushed if isfile(path)]
+
+        stats = self.get_stats()
+        stats['hits'] += len(hits)
+        stats['misses'] += len(misses)
+        stats['stores'] += len(pushed)
+        stats['evictions'] += self.evict()
+        self._save_stats(stats)
+        return len(hits), len(misses)
+
+    def evict(self, entries=None):
+        """Remove the oldest entries until the cache fits its size. The
+           entries, (path, size, mtime), are the cached artifacts by
+           default"""
+        if entries is None:
+            entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def clean(self):
+        if isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+        click.secho('Build cache cleaned', fg='green')
+
+    def get_stats(self):
+        stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        if isfile(self._stats_path):
+            with open(self._stats_path, 'r') as f:
+                try:
+                    stats.update(json.load(f))
+                except ValueError:
+                    pass
+        return stats
+
+    def list_stats(self):
+        stats = self.get_stats()
+        entries = self._entries()
+        size = sum(size for _, size, _ in entries)
+        accesses = stats['hits'] + stats['misses']
+        click.secho('Cache dir: {}'.format(self.cache_dir))
+        click.secho('Entries: {0}, {1:.2f} MB of {2:.2f} MB'.format(
+            len(entries), size / 1048576.0, self.max_size / 1048576.0))
+        click.secho('Hits: {0}, misses: {1} ({2:.1f}% hit rate)'.format(
+            stats['hits'], stats['misses'],
+            100.0 * stats['hits'] / accesses if accesses else 0),
+            fg='yellow')
+        click.secho('Stores: {0}, evictions: {1}'.format(
+            stats['stores'], stats['evictions']))
+
+    def _save_stats(self, stats):
+        if isdir(self.cache_dir):
+            with open(self._stats_path, 'w') as f:
+                json.dump(stats, f)
+
+    def _entries(self):
+        """List of (path, size, mtime) of the cached artifacts"""
+        entries = []
+        if not isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            subdir = join(self.cache_dir, name)
+            if not isdir(subdir):
+                continue
+            for entry in os.listdir(subdir):
+                path = join(subdir, entry)
+                if isfile(path):
+                    entries.append((path, getsize(path), getmtime(path)))
+        return entries
+
+
+def input_key(target, variables, project_dir, sources=[]):
+    """Hash of all the inputs of a build: the target, the scons variables
+       (FPGA, options and toolchain versions) and the contents of the
+       project sources, and of the given sources paths. It identifies the
+       set of artifacts of the build"""
+    digest = hashlib.sha1()
+    digest.update(target.encode('utf-8'))
+    for variable in sorted(_key_variables(variables, project_dir)):
+        digest.update(variable.encode('utf-8'))
+    for name in sorted(os.listdir(project_dir)):
+        if name.endswith(SOURCES_EXTENSIONS) or name == 'SConstruct':
+            path = join(project_dir, name)
+            if isfile(path):
+                digest.update(name.encode('utf-8'))
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    for name in sources:
+        path = join(project_dir, name)
+        if isfile(path):
+            digest.update(name.encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _key_variables(variables, project_dir):
+    """Scons variables without absolute paths, so that the same project
+       has the same key in any dir: the paths in the project are made
+       relative to it and the other files, as the SConstruct given with -f,
+       are replaced by the hash of their contents"""
+    key_variables = []
+    for variable in variables:
+        name, sep, value = variable.partition('=')
+        if not sep:
+            name, value = '', variable
+        if os.path.isabs(value):
+            value = _key_path(value, project_dir)
+        key_variables.append(name + sep + value)
+    return key_variables
+
+
+def _key_path(path, project_dir):
+    path = normpath(path)
+    project_dir = normpath(project_dir)
+    if path == project_dir or path.startswith(project_dir + os.sep):
+        return relpath(path, project_dir)
+    if isfile(path):
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    return path
+
+
+class RemoteCache(object):
+    """Client of an apio cache server. The artifacts are transferred with
+       HTTP GET/PUT /artifacts/<entry>, where entry is their path in the
+       local cache. The manifest /manifests/<key> lists the entries of the
+       build with the given input key, so that they are downloaded before
+       running scons. Any network error disables the remote cache for the
+       rest of the command"""
+
+    def __init__(self, cache, url=None, jobs=4, timeout=5):
+        self.cache = cache
+        self.url = (url or util._get_projconf_option_dir(
+            'cache_server', '')).rstrip('/')
+        self.jobs = jobs
+        self.timeout = timeout
+        self._online = True
+
+    @property
+    def enabled(self):
+        return bool(self.url) and self.cache.enabled and self._online
+
+    def fetch(self, key):
+        """Download the artifacts of the given build. Returns the number
+           of artifacts downloaded"""
+        r = self._request('get', '/manifests/' + key)
+        if r is None or r.status_code != 200:
+            return 0
+        try:
+            entries = [e for e in r.json() if ENTRY_RE.match(e)]
+        except ValueError:
+            return 0
+        missing = [e for e in entries
+                   if not isfile(join(self.cache.cache_dir, e))]
+        return sum(self._map(self._download, missing))
+
+    def push(self, key, entries):
+        """Upload the artifacts of the given build and its manifest"""
+        entries = [e for e in entries if ENTRY_RE.match(e)]
+        if not entries:
+            return 0
+        uploaded = sum(self._map(self._upload, entries))
+        if self.enabled:
+            self._request('put', '/manifests/' + key,
+                          data=json.dumps(sorted(set(entries))))
+        return uploaded
+
+    def _download(self, entry):
+        r = self._request('get', '/artifacts/' + entry)
+        if r is None or r.status_code != 200:
+            return 0
+        path = join(self.cache.cache_dir, *entry.split('/'))
+        if not isdir(dirname(path)):
+            try:
+                os.makedirs(dirname(path))
+            except OSError:  # pragma: no cover
+                pass
+        tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(r.content)
+        os.rename(tmp_path, path)
+        return 1
+
+    def _upload(self, entry):
+        path = join(self.cache.cache_dir, *entry.split('/'))
+        if not isfile(path):
+            return 0
+        r = self._request('head', '/artifacts/' + entry)
+        if r is None or r.status_code == 200:
+            return 0
+        with open(path, 'rb') as f:
+            r = self._request('put', '/artifacts/' + entry, data=f.read())
+        return 1 if r is not None and r.status_code in (200, 201) else 0
+
+    def _map(self, function, items):
+        if not items or not self.enabled:
+            return []
+        pool = ThreadPool(min(self.jobs, len(items)))
+        try:
+            return pool.map(function, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _request(self, method, path, data=None):
+        if not self._online:
+            return None
+        try:
+            return requests.request(method, self.url + path, data=data,
+                                    timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            if self._online:
+                self._online = False
+                click.secho(
+                    'Warning: cache server {} unreachable'.format(self.url),
+                    fg='yellow')
+            return None
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import json
+import click
+
+from os.path import isdir, isfile, join, dirname, getsize, getmtime
+from threading import Lock
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+from apio.managers.cache import BuildCache, ENTRY_RE
+
+MANIFESTS_DIR = 'manifests'
+ARTIFACTS_DIR = 'artifacts'
+
+# -- Largest upload, in MB
+DEFAULT_MAX_UPLOAD = 100
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class CacheServer(object):
+    """Reference apio cache server. It stores the artifacts and manifests
+       pushed by the clients in a BuildCache bounded by the given quota, in
+       MB, and evicts the least recently used ones. The uploads larger than
+       `max_upload` MB, or the quota, are rejected"""
+
+    def __init__(self, cache_dir, size, host='127.0.0.1', port=8080,
+                 max_upload=DEFAULT_MAX_UPLOAD):
+        self.host = host
+        self.port = port
+        self.cache_dir = cache_dir
+        self.artifacts = BuildCache(join(cache_dir, ARTIFACTS_DIR), size)
+        self.max_upload = min(int(max_upload * 1024 * 1024),
+                              self.artifacts.max_size)
+        self.manifests_dir = join(cache_dir, MANIFESTS_DIR)
+        self.lock = Lock()
+        for path in (self.artifacts.cache_dir, self.manifests_dir):
+            if not isdir(path):
+                os.makedirs(path)
+
+    def run(self):
+        server = _ThreadingHTTPServer((self.host, self.port),
+                                      self._handler())
+        click.secho('Apio cache server on http://{0}:{1}'.format(
+            self.host, self.port), fg='green')
+        click.secho('Cache dir: {0}, quota {1:.2f} MB'.format(
+            self.cache_dir, self.artifacts.max_size / 1048576.0))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def get_path(self, url):
+        """Local path of the artifact or manifest of the url"""
+        parts = url.strip('/').split('/', 1)
+        if len(parts) != 2:
+            return None
+        kind, name = parts
+        if kind == ARTIFACTS_DIR and ENTRY_RE.match(name):
+            return join(self.artifacts.cache_dir, *name.split('/'))
+        if kind == MANIFESTS_DIR and name.isalnum():
+            return join(self.manifests_dir, name)
+        return None
+
+    def store(self, path, data, artifact=True):
+        if not isdir(dirname(path)):
+            os.makedirs(dirname(path))
+        tmp_path = '{0}.{1}.tmp'.format(path, id(data))
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        with self.lock:
+            os.rename(tmp_path, path)
+            stats = self.artifacts.get_stats()
+            if artifact:
+                stats['stores'] += 1
+            stats['evictions'] += self.artifacts.evict(self._entries())
+            self.artifacts._save_stats(stats)
+
+    def account(self, hit):
+        with self.lock:
+            stats = self.artifacts.get_stats()
+            stats['hits' if hit else 'misses'] += 1
+            self.artifacts._save_stats(stats)
+
+    def _entries(self):
+        """Artifacts and manifests, that share the quota"""
+        entries = self.artifacts._entries()
+        for name in os.listdir(self.manifests_dir):
+            path = join(self.manifests_dir, name)
+            if isfile(path):
+                entries.append((path, getsize(path), getmtime(path)))
+        return entries
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_HEAD(self):
+                path = server.get_path(self.path)
+                self._reply(200 if path and isfile(path) else 404)
+
+            def do_GET(self):
+                if self.path == '/stats':
+                    return self._reply(200, json.dumps(
+                        server.artifacts.get_stats()).encode('utf-8'))
+                path = server.get_path(self.path)
+                if not path or not isfile(path):
+                    if path and MANIFESTS_DIR not in self.path:
+                        server.account(False)
+                    return self._reply(404)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                # Mark the artifact or manifest as recently used
+                os.utime(path, None)
+                if MANIFESTS_DIR not in self.path:
+                    server.account(True)
+                self._reply(200, data)
+
+            def do_PUT(self):
+                path = server.get_path(self.path)
+                if not path:
+                    return self._reply(400)
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > server.max_upload:
+                    # The body is not read
+                    self.close_connection = True
+                    return self._reply(400 if length < 0 else 413)
+                server.store(path, self.rfile.read(length),
+                             MANIFESTS_DIR not in self.path)
+                self._reply(201)
+
+            def log_message(self, format, *args):
+                click.secho('{0} - {1}'.format(
+                    self.address_string(), format % args))
+
+            def _reply(self, code, data=b''):
+                self.send_response(code)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if data and self.command != 'HEAD':
+                    self.wfile.write(data)
+
+        return Handler
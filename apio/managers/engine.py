@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import sys
+
+from os.path import isdir, isfile, join
+from glob import glob
+
+# -- Dirs of the SCons engine in the tool-scons package
+ENGINE_DIRS = ['engine', 'scons-local-*', join('lib', 'scons*')]
+
+# -- Loaded engines: {package dir: engine}
+_engines = {}
+
+
+class SConsEngine(object):
+    """SCons engine of the tool-scons package, imported in the apio process.
+       The builds run in a fork of the process that calls the SCons main
+       function, instead of a new python interpreter that imports SCons
+       again. The engine is imported once per process, so the
+       following builds of a long-lived process start warm"""
+
+    def __init__(self, scons_dir):
+        self.path = find_engine(scons_dir)
+
+    @classmethod
+    def get(cls, scons_dir):
+        """Engine of the package, loaded. None if it can not be imported"""
+        if scons_dir not in _engines:
+            engine = cls(scons_dir)
+            _engines[scons_dir] = engine if engine.load() else None
+        return _engines[scons_dir]
+
+    @staticmethod
+    def available():
+        """Forks are only available on POSIX"""
+        return hasattr(os, 'fork')
+
+    def load(self):
+        if not self.path or not self.available():
+            return False
+        if self.path not in sys.path:
+            sys.path.insert(0, self.path)
+        try:
+            import SCons.Script  # noqa: F401
+        except Exception:
+            # -- Not compatible with this python version
+            sys.path.remove(self.path)
+            return False
+        return True
+
+    def main(self, args):
+        """Run scons with the given arguments, in the current process.
+           Raises SystemExit with the exit code of the build. The exit
+           functions registered by the build in SCons.exitfuncs, as the
+           scan cache of the SConstruct, are run when it ends, since a
+           fork does not run them"""
+        import SCons.Script
+        import SCons.exitfuncs
+        sys.argv = ['scons'] + list(args)
+        try:
+            SCons.Script.main()
+        finally:
+            SCons.exitfuncs._run_exitfuncs()
+
+
+def find_engine(scons_dir):
+    """Dir that contains the SCons package, or None"""
+    if not scons_dir or not isdir(scons_dir):
+        return None
+    for pattern in ENGINE_DIRS:
+        for path in sorted(glob(join(scons_dir, pattern))):
+            if isfile(join(path, 'SCons', '__init__.py')):
+                return path
+    return None
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import click
+
+from apio.managers.report import parse_netlist
+
+# -- Resources compared with the FPGA capacities: (key, name)
+RESOURCES = [('luts', 'LCs'), ('brams', 'BRAMs'), ('ios', 'IOs'),
+             ('plls', 'PLLs')]
+
+
+class Estimate(object):
+    """Resource usage of a synthesized design, from the cells and ports of
+       its netlist, compared with the capacities of the FPGAs. The logic
+       cells are estimated as the largest number of LUTs, flip-flops or
+       carries, because every iCE40 logic cell has one of each, so it is
+       a lower bound of the logic cells used after placement"""
+
+    def __init__(self, resources, netlist):
+        self.resources = resources
+        self.usage = None
+        cells = parse_netlist(netlist)
+        if cells is not None:
+            self.usage = {
+                'luts': max(cells['luts'], cells['ffs'], cells['carries']),
+                'brams': cells['brams'],
+                'ios': cells['ios'],
+                'plls': cells['plls']
+            }
+
+    def fits(self, fpga):
+        """The design fits the FPGA. Unknown capacities are not checked"""
+        capacity = self.resources.fpgas[fpga]
+        return all(capacity.get(key) is None or
+                   self.usage[key] <= capacity[key] for key, _ in RESOURCES)
+
+    def check(self, fpga):
+        """Show the utilization table of the FPGA and, if the design does
+           not fit, the smallest FPGA and board that fit. Returns the exit
+           code"""
+        self.show(fpga)
+        if self.fits(fpga):
+            click.secho('The design fits the {}'.format(fpga), fg='green')
+            return 0
+        click.secho('Error: the design does not fit the {}'.format(fpga),
+                    fg='red')
+        self.suggest()
+        return 1
+
+    def show(self, fpga):
+        capacity = self.resources.fpgas[fpga]
+        click.secho('{0:10} {1:>8} {2:>10} {3:>8}'.format(
+            'Resource', 'Used', 'Available', 'Usage'), bold=True)
+        for key, name in RESOURCES:
+            used, available = self.usage[key], capacity.get(key)
+            if available is None:
+                click.secho('{0:10} {1:>8} {2:>10} {3:>8}'.format(
+                    name, used, '-', '-'))
+                continue
+            click.secho('{0:10} {1:>8} {2:>10} {3:>8}'.format(
+                name, used, available, '{:.1f}%'.format(
+                    100.0 * used / available) if available else '-'),
+                fg='red' if used > available else None)
+
+    def suggest(self):
+        """Show the smallest FPGA and the smallest board that fit"""
+        fpgas = self.smallest()
+        if not fpgas:
+            click.secho('No FPGA fits the design', fg='yellow')
+            return
+        click.secho('Smallest FPGA that fits: {}'.format(fpgas[0]),
+                    fg='yellow')
+        for fpga in fpgas:
+            boards = [name for name, board in self.resources.boards.items()
+                      if board['fpga'] == fpga]
+            if boards:
+                click.secho('Smallest board that fits: {0} ({1})'.format(
+                    ', '.join(boards), fpga), fg='yellow')
+                break
+
+    def smallest(self):
+        """FPGAs that fit the design, the smallest first"""
+        fpgas = [name for name in self.resources.fpgas if self.fits(name)]
+        return sorted(fpgas, key=lambda name: tuple(
+            self.resources.fpgas[name].get(key) or 0
+            for key, _ in RESOURCES) + (name,))
@@ -19,6 +19,7 @@ from apio.profile import Profile
 
 from apio.managers.downloader import FileDownloader
 from apio.managers.unpacker import FileUnpacker
+from apio.managers.toolchain import Toolchain
 
 
 class Installer(object):
@@ -141,6 +142,9 @@ class Installer(object):
                 if isdir(unpack_dir):
                     rename(unpack_dir, package_dir)
 
+            # Update the toolchain environment
+            Toolchain().update()
+
     def uninstall(self):
         if self.packages_dir == '':
             click.secho(
@@ -160,6 +164,7 @@ class Installer(object):
                     self.package), fg='red')
             self.profile.remove_package(self.package)
             self.profile.save()
+            Toolchain().update()
 
     def _get_platform(self):
         return get_systype()
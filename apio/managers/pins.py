@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import json
+
+from os.path import isdir, isfile, join, getmtime, dirname, abspath
+
+from apio import util
+
+PINS_FILENAME = 'pins.json'
+
+# -- Dirs of the icestorm chipdb files, when the tools are not installed
+# -- by apio
+CHIPDB_DIRS = ['/usr/local/share/icebox', '/usr/share/icebox']
+
+# -- Executable of the icestorm tools, installed next to the chipdb files
+ICEPACK = 'icepack.exe' if os.name == 'nt' else 'icepack'
+
+# -- Bank of the differential inputs
+LVDS_BANK = 3
+
+
+class PinDatabase(object):
+    """Package pins of the iCE40 devices: {size: {package: {pin: [x, y, z,
+       bank]}}}. The pins are parsed once from the chipdb files of the
+       icestorm package and cached in the apio home dir, until the package
+       changes"""
+
+    def __init__(self, icestorm_dir=''):
+        self.icestorm_dir = icestorm_dir
+        self._path = join(util.get_home_dir(), PINS_FILENAME)
+        self._data = None
+
+    def get_pins(self, size, pack):
+        """Pins of the package, or None if they are unknown"""
+        if self._data is None:
+            self._data = self._load()
+        return self._data['devices'].get(size, {}).get(pack)
+
+    def _load(self):
+        chipdbs = self._find_chipdbs()
+        key = dict((size, getmtime(path)) for size, path in chipdbs.items())
+        if isfile(self._path):
+            with open(self._path, 'r') as f:
+                try:
+                    data = json.load(f)
+                    if data['key'] == key:
+                        return data
+                except (ValueError, KeyError):
+                    pass
+        data = {
+            'key': key,
+            'devices': dict((size, parse_chipdb(path))
+                            for size, path in chipdbs.items())
+        }
+        try:
+            with open(self._path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+        except IOError:  # pragma: no cover
+            pass
+        return data
+
+    def _find_chipdbs(self):
+        """{size: path} of the chipdb-<size>.txt files"""
+        dirs = []
+        if self.icestorm_dir and isdir(self.icestorm_dir):
+            for path, _, filenames in os.walk(self.icestorm_dir):
+                if any(name.startswith('chipdb-') for name in filenames):
+                    dirs.append(path)
+        dirs += system_chipdb_dirs()
+        chipdbs = {}
+        for path in dirs:
+            if not isdir(path):
+                continue
+            for name in os.listdir(path):
+                if name.startswith('chipdb-') and name.endswith('.txt'):
+                    size = name[len('chipdb-'):-len('.txt')]
+                    chipdbs.setdefault(size, join(path, name))
+        return chipdbs
+
+
+def system_chipdb_dirs():
+    """Dirs of the chipdb files of the icestorm tools not installed by
+       apio: the share/icebox dir of the icepack found on the PATH, and
+       the CHIPDB_DIRS"""
+    dirs = []
+    for path in os.environ.get('PATH', '').split(os.pathsep):
+        if path and isfile(join(path, ICEPACK)):
+            dirs.append(join(dirname(abspath(path)), 'share', 'icebox'))
+    return dirs + CHIPDB_DIRS
+
+
+def parse_chipdb(path):
+    """{package: {pin: [x, y, z, bank]}} of an icestorm chipdb file. The
+       bank of a pin is the side of the chip of its IO tile"""
+    packages = {}
+    width = height = 0
+    pins = None
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == '.device':
+                width, height = int(fields[2]), int(fields[3])
+            elif fields[0] == '.pins':
+                pins = packages[fields[1]] = {}
+            elif fields[0].startswith('.'):
+                # -- The pins are at the beginning of the file
+                if packages:
+                    break
+            elif pins is not None and len(fields) == 4:
+                x, y, z = [int(v) for v in fields[1:]]
+                pins[fields[0]] = [x, y, z, _bank(x, y, width, height)]
+    return packages
+
+
+def _bank(x, y, width, height):
+    if x == 0:
+        return 3
+    if y == 0:
+        return 2
+    if x == width - 1:
+        return 1
+    return 0
+
+
+def check_pcf(path, pins, pack):
+    """Errors of a pcf file: unknown commands and pins, pins and ports
+       assigned twice and differential inputs out of their bank"""
+    errors = []
+    ports = {}
+    used = {}
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    for number, line in enumerate(lines, 1):
+        fields = line.split('#', 1)[0].split()
+        if not fields:
+            continue
+        where = '{0}:{1}'.format(os.path.basename(path), number)
+        if fields[0] != 'set_io':
+            errors.append('{0}: unknown command: {1}'.format(
+                where, fields[0]))
+            continue
+        # -- set_io [-nowarn] [-pullup yes|no] [-io_std std] port pin
+        options = {}
+        args = []
+        i = 1
+        while i < len(fields):
+            if fields[i] == '-nowarn':
+                i += 1
+            elif fields[i].startswith('-'):
+                options[fields[i]] = fields[i + 1] \
+                    if i + 1 < len(fields) else ''
+                i += 2
+            else:
+                args.append(fields[i])
+                i += 1
+        if len(args) != 2:
+            errors.append('{0}: expected a port and a pin'.format(where))
+            continue
+        port, pin = args
+        if pins is not None and pin not in pins:
+            errors.append('{0}: unknown pin {1} of the {2} package'.format(
+                where, pin, pack))
+            continue
+        if port in ports:
+            errors.append('{0}: port {1} already assigned to pin {2}'.format(
+                where, port, ports[port]))
+        if pin in used:
+            errors.append('{0}: pin {1} already assigned to port {2}'.format(
+                where, pin, used[pin]))
+        ports.setdefault(port, pin)
+        used.setdefault(pin, port)
+        if pins is not None and \
+           options.get('-io_std') == 'SB_LVDS_INPUT' and \
+           pins[pin][3] != LVDS_BANK:
+            errors.append('{0}: differential input {1} on pin {2} of bank '
+                          '{3}, only bank {4} supports SB_LVDS_INPUT'.format(
+                              where, port, pin, pins[pin][3], LVDS_BANK))
+    return errors
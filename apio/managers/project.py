@@ -24,6 +24,7 @@ class Project(object):
 
     def __init__(self):
         self.board = None
+        self._config = None
 
     def create_sconstruct(self, project_dir='', sayyes=False):
         """Creates a default SConstruct file"""
@@ -148,3 +149,16 @@ class Project(object):
                 PROJECT_FILENAME))
             print('No \'board\' field defined in project file')
             sys.exit(1)
+
+    def get_option(self, option, default=None):
+        """Read an optional setting of the project file [env] section"""
+        if self._config is None:
+            self._config = ConfigParser.ConfigParser()
+            if isfile(PROJECT_FILENAME):
+                try:
+                    self._config.read(PROJECT_FILENAME)
+                except ConfigParser.Error:
+                    pass
+        if self._config.has_option('env', option):
+            return self._config.get('env', option)
+        return default
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import io
+import os
+import re
+import json
+import time
+import click
+import datetime
+
+from os.path import isdir, join, getmtime
+
+from apio import util
+
+LOGS_DIR = join('.apio', 'logs')
+
+# -- Logs kept per target
+KEEP_LOGS = 20
+
+# -- Messages of the tools: `ERROR: ...` (yosys), `leds.v:3: error: ...`
+# -- (iverilog), `fatal error: ...` (arachne-pnr), `scons: *** ...` and
+# -- python exceptions. Summaries as `0 errors` are not errors
+ERROR_RE = re.compile(r'^\s*(?:\S+:\s*)?(?:fatal\s+)?error\b|'
+                      r'^scons: \*\*\*|^\w*(?:Error|Exception):',
+                      re.IGNORECASE)
+WARNING_RE = re.compile(r'\bwarning\b\s*:', re.IGNORECASE)
+
+# -- Build stages, detected from the commands echoed by scons
+STAGE_TOOLS = {
+    'yosys': 'synth',
+    'arachne-pnr': 'pnr',
+    'icepack': 'pack',
+    'icetime': 'time',
+    'iverilog': 'compile',
+    'vvp': 'sim',
+    'gtkwave': 'wave',
+    'iceprog': 'upload',
+    'icoprog': 'upload',
+    'litterbox': 'upload'
+}
+STAGE_RE = re.compile(r'^(?:.*;\s*)?(?:sudo\s+)?({0})(?:\s|$)'.format(
+    '|'.join(re.escape(tool) for tool in STAGE_TOOLS)))
+
+
+class Renderer(object):
+    """Render the output of a build. Every line is written to the log file,
+       of which only the newest KEEP_LOGS per target are kept, and the
+       console receives batched writes: at most one every
+       `interval` seconds or every `batch` lines. In quiet mode only the
+       warnings and errors reach the console. The console lines of
+       parallel builds are tagged with their `prefix`"""
+
+    def __init__(self, target, quiet=False, interval=0.1, batch=200,
+                 prefix=None):
+        self.quiet = quiet
+        self.prefix = prefix
+        self.interval = interval
+        self.batch = batch
+        self.warnings = 0
+        self.errors = 0
+        self.stages = []
+
+        self._pending = []
+        self._last_flush = time.time()
+
+        logs_dir = join(util.get_project_dir(), LOGS_DIR)
+        if not isdir(logs_dir):
+            os.makedirs(logs_dir)
+        self.log_path, self._log = open_log(logs_dir, target)
+        remove_logs(logs_dir, target)
+
+    @property
+    def stage(self):
+        """Current stage: {'name', 'tool', 'start', 'end'}"""
+        return self.stages[-1] if self.stages else None
+
+    def skipped(self, stages):
+        """Stages of the given list that have not been run"""
+        ran = set(stage['name'] for stage in self.stages)
+        return [stage for stage in stages if stage not in ran]
+
+    def on_out(self, line):
+        self._log.write(line + '\n')
+        match = STAGE_RE.match(line)
+        if match:
+            self._start_stage(match.group(1))
+        self._render(line)
+
+    def on_err(self, line):
+        # -- The tools also write their progress to stderr: only the
+        # -- warnings and errors are counted
+        self._log.write(line + '\n')
+        self._render(line)
+
+    def _render(self, line):
+        level = _level(line)
+        if level == 'error':
+            self.errors += 1
+            self._echo(line, 'red')
+        elif level == 'warning':
+            self.warnings += 1
+            self._echo(line, 'yellow')
+        elif not self.quiet:
+            self._echo(line, 'green' if 'is up to date' in line else None)
+
+    def flush(self):
+        if self._pending:
+            click.echo('\n'.join(self._pending))
+            self._pending = []
+        self._last_flush = time.time()
+
+    def close(self, summary=True):
+        self.flush()
+        self._log.close()
+        if self.stage and self.stage['end'] is None:
+            self.stage['end'] = time.time()
+        if self.quiet and summary:
+            click.secho('{0} warnings, {1} errors'.format(
+                self.warnings, self.errors),
+                fg='red' if self.errors else 'yellow')
+            click.secho('Full log: {}'.format(self.log_path))
+
+    def _start_stage(self, tool):
+        now = time.time()
+        if self.stage and self.stage['end'] is None:
+            self.stage['end'] = now
+        self.stages.append({
+            'name': STAGE_TOOLS[tool],
+            'tool': tool,
+            'start': now,
+            'end': None
+        })
+
+    def _echo(self, line, fg=None):
+        if fg:
+            line = click.style(line, fg=fg)
+        if self.prefix:
+            line = '[{0}] {1}'.format(self.prefix, line)
+        self._pending.append(line)
+        if len(self._pending) >= self.batch or \
+           time.time() - self._last_flush >= self.interval:
+            self.flush()
+
+
+class JsonRenderer(Renderer):
+    """Render the output of a build as a stream of json events, one per
+       line: the start and end of every stage, the lines of the tools,
+       tagged with their stage, stream and level, and the result of the
+       command. The lines are also written to the log file"""
+
+    def __init__(self, target, stream, prefix=None):
+        super(JsonRenderer, self).__init__(target, prefix=prefix)
+        self._stream = stream
+
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': round(time.time(), 3)}
+        if self.prefix:
+            record['target'] = self.prefix
+        record.update(fields)
+        self._stream.write(json.dumps(record, sort_keys=True) + '\n')
+        self._stream.flush()
+
+    def on_out(self, line):
+        self._log.write(line + '\n')
+        match = STAGE_RE.match(line)
+        if match:
+            self._start_stage(match.group(1))
+        self._emit_line(line, 'stdout', _level(line))
+
+    def on_err(self, line):
+        self._log.write(line + '\n')
+        self._emit_line(line, 'stderr', _level(line))
+
+    def close(self, summary=True):
+        self._log.close()
+        self._end_stage(time.time())
+
+    def result(self, command, board, exit_code, elapsed, skipped=()):
+        self.emit('result', command=command, board=board,
+                  exit_code=exit_code, success=exit_code == 0,
+                  elapsed=round(elapsed, 3), warnings=self.warnings,
+                  errors=self.errors, skipped=list(skipped),
+                  log=self.log_path)
+
+    def _start_stage(self, tool):
+        self._end_stage(time.time())
+        super(JsonRenderer, self)._start_stage(tool)
+        self.emit('stage_start', stage=self.stage['name'], tool=tool)
+
+    def _end_stage(self, now):
+        if self.stage and self.stage['end'] is None:
+            self.stage['end'] = now
+            self.emit('stage_end', stage=self.stage['name'],
+                      tool=self.stage['tool'],
+                      elapsed=round(now - self.stage['start'], 3))
+
+    def _emit_line(self, line, stream, level):
+        if level == 'error':
+            self.errors += 1
+        elif level == 'warning':
+            self.warnings += 1
+        self.emit('output', stage=self.stage['name'] if self.stage else None,
+                  stream=stream, level=level, text=line)
+
+
+def _level(line):
+    if ERROR_RE.search(line):
+        return 'error'
+    if WARNING_RE.search(line):
+        return 'warning'
+    return 'info'
+
+
+def open_log(logs_dir, target):
+    """New log file of the target: (path, file). The name has the date,
+       the process id and a counter, so that the builds started in the
+       same second do not share it"""
+    name = '{0}-{1}-{2}'.format(
+        target, datetime.datetime.now().strftime('%Y%m%d-%H%M%S'),
+        os.getpid())
+    index = 0
+    while True:
+        path = join(logs_dir, '{0}{1}.log'.format(
+            name, '-{}'.format(index) if index else ''))
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except OSError:
+            if not os.path.exists(path):
+                raise
+            index += 1
+            continue
+        return path, io.open(fd, 'w', encoding='utf-8')
+
+
+def remove_logs(logs_dir, target, keep=KEEP_LOGS):
+    """Remove the oldest logs of the target, but the newest `keep`"""
+    log_re = re.compile(r'^{}-\d{{8}}-\d{{6}}-\d+(?:-\d+)?\.log$'.format(
+        re.escape(target)))
+    logs = []
+    for name in os.listdir(logs_dir):
+        if log_re.match(name):
+            try:
+                logs.append((getmtime(join(logs_dir, name)), name))
+            except OSError:  # pragma: no cover
+                pass
+    for _, name in sorted(logs, reverse=True)[keep:]:
+        try:
+            os.remove(join(logs_dir, name))
+        except OSError:  # pragma: no cover
+            pass
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import io
+import re
+import json
+
+from os.path import isfile, getmtime
+
+# -- icetime: Total path delay: 4.24 ns (235.98 MHz)
+TIMING_RE = re.compile(r'(?:Total path delay|Timing estimate):\s+'
+                       r'(?P<delay>[\d.]+)\s+ns\s+\((?P<fmax>[\d.]+)\s+MHz\)')
+
+# -- arachne-pnr: LCs          8 / 1280
+UTILIZATION_RE = re.compile(r'^\s*(?P<resource>IOs|LCs|BRAMs|PLLs)\s+'
+                            r'(?P<used>\d+)\s*/\s*(?P<total>\d+)\s*$')
+
+# -- yosys stat: Number of cells:                 12
+CELLS_RE = re.compile(r'^\s*Number of cells:\s+(?P<count>\d+)\s*$')
+CELL_RE = re.compile(r'^\s*(?P<cell>[$\\]?\w+)\s+(?P<count>\d+)\s*$')
+
+REPORT_FILENAME = 'report.json'
+
+
+def parse_timing(path):
+    """Critical path of an icetime report: {'delay', 'fmax'} or None"""
+    if not isfile(path):
+        return None
+    with open(path, 'r') as f:
+        for line in f:
+            match = TIMING_RE.search(line)
+            if match:
+                return {
+                    'delay': float(match.group('delay')),
+                    'fmax': float(match.group('fmax'))
+                }
+    return None
+
+
+def parse_log(path):
+    """Utilization and timing of a build, from its log:
+       {'luts', 'brams', 'fmax'}. Missing values are None"""
+    result = {'luts': None, 'brams': None, 'fmax': None}
+    if not isfile(path):
+        return result
+    with io.open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = UTILIZATION_RE.match(line)
+            if match and match.group('resource') in ('LCs', 'BRAMs'):
+                key = 'luts' if match.group('resource') == 'LCs' \
+                    else 'brams'
+                # The first report, after packing, is kept
+                if result[key] is None:
+                    result[key] = int(match.group('used'))
+                continue
+            match = TIMING_RE.search(line)
+            if match:
+                result['fmax'] = float(match.group('fmax'))
+    return result
+
+
+def parse_netlist(path):
+    """Cells and ports of a synthesized blif netlist: {'luts', 'ffs',
+       'carries', 'brams', 'plls', 'ios'}, or None"""
+    if not isfile(path):
+        return None
+    result = {'luts': 0, 'ffs': 0, 'carries': 0, 'brams': 0, 'plls': 0,
+              'ios': 0}
+    models = 0
+    with open(path, 'r') as f:
+        # -- Join the continuation lines
+        for line in f.read().replace('\\\n', ' ').splitlines():
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == '.model':
+                models += 1
+            elif fields[0] in ('.inputs', '.outputs') and models == 1:
+                # -- Ports of the top model
+                result['ios'] += len(fields) - 1
+            elif fields[0] in ('.subckt', '.gate') and len(fields) > 1:
+                cell = fields[1]
+                if cell == 'SB_LUT4':
+                    result['luts'] += 1
+                elif cell.startswith('SB_DFF'):
+                    result['ffs'] += 1
+                elif cell == 'SB_CARRY':
+                    result['carries'] += 1
+                elif cell.startswith('SB_RAM40_4K'):
+                    result['brams'] += 1
+                elif cell.startswith('SB_PLL40'):
+                    result['plls'] += 1
+    return result
+
+
+def parse_stat(path):
+    """Cells of the last yosys `stat` of a log: {'cells', 'types'}, or
+       None"""
+    result = None
+    if not isfile(path):
+        return result
+    cells = False
+    with io.open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = CELLS_RE.match(line)
+            if match:
+                result = {'cells': int(match.group('count')), 'types': {}}
+                cells = True
+                continue
+            match = CELL_RE.match(line)
+            if match and cells:
+                result['types'][match.group('cell')] = \
+                    int(match.group('count'))
+            elif line.strip():
+                # -- End of the cells list
+                cells = False
+    return result
+
+
+def parse_packing(path):
+    """Utilization of the arachne-pnr packing summary of a log:
+       {'ios', 'lcs', 'brams', 'plls'} with the used and available
+       resources, or None"""
+    result = {}
+    if not isfile(path):
+        return None
+    with io.open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = UTILIZATION_RE.match(line)
+            if match:
+                # The first report, after packing, is kept
+                result.setdefault(match.group('resource').lower(), {
+                    'used': int(match.group('used')),
+                    'available': int(match.group('total'))
+                })
+    return result or None
+
+
+def update_report(path, log_path, rpt_path, asc_path, build, target=None):
+    """Update the json report of a build: the cells of the synthesis, the
+       utilization after packing and the critical path. The sections of
+       the stages that were up to date are kept from the previous report.
+       The fmax is compared with the target clock, in MHz"""
+    report = {}
+    if isfile(path):
+        with open(path, 'r') as f:
+            try:
+                report = json.load(f)
+            except ValueError:
+                report = {}
+    report.update(build)
+
+    stat = parse_stat(log_path)
+    if stat is not None:
+        report['synthesis'] = stat
+    packing = parse_packing(log_path)
+    if packing is not None:
+        report['utilization'] = dict(
+            (key, dict(value, usage=round(
+                100.0 * value['used'] / value['available'], 1)
+                if value['available'] else None))
+            for key, value in packing.items())
+
+    # -- The timing report is only valid if it is newer than the layout
+    timing = parse_timing(rpt_path)
+    if timing is not None and isfile(asc_path) and \
+       getmtime(rpt_path) >= getmtime(asc_path):
+        timing.update({
+            'target': target,
+            'met': timing['fmax'] >= target if target else None,
+            'slack': round(1000.0 / target - timing['delay'], 2)
+            if target else None
+        })
+        report['timing'] = timing
+    else:
+        report.pop('timing', None)
+
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return report
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import sys
+import time
+import signal
+import traceback
+import subprocess
+from platform import system
+from collections import deque
+from threading import Thread
+
+try:
+    import selectors
+except ImportError:  # pragma: no cover
+    selectors = None
+
+try:
+    from queue import Queue, Empty
+except ImportError:  # pragma: no cover
+    from Queue import Queue, Empty
+
+isWindows = system() == 'Windows'
+
+STDOUT = 'stdout'
+STDERR = 'stderr'
+
+
+class Job(object):
+    """A child process whose output lines are dispatched by a Runner"""
+
+    def __init__(self, args, outcallback=None, errcallback=None,
+                 listener=None, timeout=None, name=None, capture=None):
+        self.args = args
+        self.name = name
+        self.timeout = timeout
+        self.outcallback = outcallback
+        self.errcallback = errcallback
+        self.listener = listener
+        # -- Lines of both streams kept in memory
+        self.capture = capture if capture is not None else NullCapture()
+
+        self.process = None
+        self.returncode = None
+        self.start_time = None
+        self.end_time = None
+        self.timed_out = False
+        self.cancelled = False
+
+        self._partial = {STDOUT: b'', STDERR: b''}
+        self._open_streams = 0
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def done(self):
+        return self.returncode is not None
+
+    @property
+    def elapsed(self):
+        end = self.end_time or time.time()
+        return end - self.start_time if self.start_time else 0
+
+    def feed(self, stream, data, timestamp):
+        """Split the received bytes in lines and dispatch them"""
+        data = self._partial[stream] + data
+        lines = data.split(b'\n')
+        self._partial[stream] = lines.pop()
+        for line in lines:
+            self._dispatch(stream, line, timestamp)
+
+    def flush(self, stream, timestamp):
+        if self._partial[stream]:
+            self._dispatch(stream, self._partial[stream], timestamp)
+            self._partial[stream] = b''
+
+    def _dispatch(self, stream, line, timestamp):
+        line = line.decode('utf-8', 'replace').strip()
+        self.capture.append(line)
+        if self.listener:
+            self.listener(self, stream, line, timestamp)
+        callback = self.outcallback if stream == STDOUT else self.errcallback
+        if callback:
+            callback(line)
+
+
+class Runner(object):
+    """Run several child processes multiplexing their outputs on a single
+       thread. Each child is started in its own process group, so that
+       cancelling a job also kills all the processes it has spawned"""
+
+    def __init__(self):
+        self.jobs = []
+        if isWindows or selectors is None:
+            # Pipes can not be polled on Windows: a reader thread per
+            # stream fills a queue that is consumed by the runner thread
+            self._selector = None
+            self._queue = Queue()
+        else:
+            self._selector = selectors.DefaultSelector()
+
+    @property
+    def active(self):
+        return [job for job in self.jobs if not job.done]
+
+    def spawn(self, args, outcallback=None, errcallback=None, listener=None,
+              timeout=None, name=None, capture=None, **kwargs):
+        """Start a new job. The capture selects the output lines kept by
+           the job. Any extra kwargs are given to subprocess.Popen"""
+        job = Job(args, outcallback, errcallback, listener, timeout, name,
+                  capture)
+
+        kwargs.setdefault('stdin', None)
+        kwargs['stdout'] = subprocess.PIPE
+        kwargs['stderr'] = subprocess.PIPE
+        if isWindows:
+            kwargs['creationflags'] = kwargs.get('creationflags', 0) | \
+                subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['preexec_fn'] = os.setsid
+
+        job.start_time = time.time()
+        job.process = subprocess.Popen(args, **kwargs)
+        return self._start(job)
+
+    def fork(self, target, outcallback=None, errcallback=None, listener=None,
+             timeout=None, name=None, capture=None):
+        """Start a new job that runs the target function in a fork of the
+           current process, in its own process group. Only on POSIX"""
+        job = Job(target, outcallback, errcallback, listener, timeout, name,
+                  capture)
+        job.start_time = time.time()
+        job.process = ForkProcess(target)
+        return self._start(job)
+
+    def _start(self, job):
+        self.jobs.append(job)
+
+        for stream, pipe in ((STDOUT, job.process.stdout),
+                             (STDERR, job.process.stderr)):
+            job._open_streams += 1
+            if self._selector:
+                self._selector.register(pipe, selectors.EVENT_READ,
+                                        (job, stream))
+            else:
+                reader = Thread(target=self._read_pipe,
+                                args=(job, stream, pipe))
+                reader.daemon = True
+                reader.start()
+
+        return job
+
+    def poll(self, timeout=None):
+        """Dispatch the pending output. Returns the jobs finished"""
+        if self._selector:
+            self._poll_selector(timeout)
+        else:
+            self._poll_queue(timeout)
+
+        finished = []
+        now = time.time()
+        for job in self.active:
+            if job.timeout and now - job.start_time > job.timeout:
+                job.timed_out = True
+                self.cancel(job)
+            if job._open_streams == 0 and job.process.poll() is not None:
+                job.returncode = job.process.returncode
+                job.end_time = time.time()
+                finished.append(job)
+        return finished
+
+    def wait(self, job=None, tick=None, interval=0.1):
+        """Run until the given job, or all the jobs, have finished.
+           The tick callback is called at least every `interval` seconds"""
+        try:
+            while (not job.done) if job else self.active:
+                timeout = self._next_timeout()
+                if tick:
+                    timeout = interval if timeout is None else \
+                        min(timeout, interval)
+                self.poll(timeout)
+                if tick:
+                    tick()
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        return job
+
+    def cancel(self, job=None):
+        """Kill the process group of the given job, or of all the jobs"""
+        for j in [job] if job else self.active:
+            if j.done or j.process.poll() is not None:
+                continue
+            j.cancelled = True
+            try:
+                if isWindows:
+                    j.process.kill()
+                else:
+                    os.killpg(j.process.pid, signal.SIGKILL)
+            except OSError:  # pragma: no cover
+                pass
+
+    def _next_timeout(self):
+        timeouts = [job.start_time + job.timeout - time.time()
+                    for job in self.active if job.timeout]
+        if any(job._open_streams == 0 for job in self.active):
+            # Output closed: wait for the process exit
+            timeouts.append(0.05)
+        return max(0, min(timeouts)) if timeouts else None
+
+    def _poll_selector(self, timeout):
+        if not self._selector.get_map():
+            time.sleep(timeout or 0)
+            return
+        for key, _ in self._selector.select(timeout):
+            job, stream = key.data
+            now = time.time()
+            data = os.read(key.fileobj.fileno(), 65536)
+            if data:
+                job.feed(stream, data, now)
+            else:
+                job.flush(stream, now)
+                self._selector.unregister(key.fileobj)
+                key.fileobj.close()
+                job._open_streams -= 1
+
+    def _poll_queue(self, timeout):
+        try:
+            job, stream, data, now = self._queue.get(True, timeout)
+        except Empty:
+            return
+        while True:
+            if data:
+                job.feed(stream, data, now)
+            else:
+                job.flush(stream, now)
+                job._open_streams -= 1
+            try:
+                job, stream, data, now = self._queue.get_nowait()
+            except Empty:
+                break
+
+    def _read_pipe(self, job, stream, pipe):  # pragma: no cover
+        for data in iter(lambda: pipe.readline(), b''):
+            self._queue.put((job, stream, data, time.time()))
+        pipe.close()
+        self._queue.put((job, stream, b'', time.time()))
+
+
+class ForkProcess(object):
+    """A fork of the current process that runs a function, with the
+       subset of the subprocess.Popen interface used by the Runner. The
+       modules already imported are shared with the child, so it starts
+       without loading a new interpreter. The exit code of the child is
+       the SystemExit code raised by the function, or 0"""
+
+    def __init__(self, target):
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        self.pid = os.fork()
+        if self.pid == 0:  # pragma: no cover
+            os.setsid()
+            os.close(out_read)
+            os.close(err_read)
+            os.dup2(out_write, 1)
+            os.dup2(err_write, 2)
+            os._exit(self._run_child(target))
+        os.close(out_write)
+        os.close(err_write)
+        self.stdout = os.fdopen(out_read, 'rb')
+        self.stderr = os.fdopen(err_read, 'rb')
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            pid, status = os.waitpid(self.pid, os.WNOHANG)
+            if pid:
+                self.returncode = os.WEXITSTATUS(status) \
+                    if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        return self.returncode
+
+    def kill(self):
+        os.kill(self.pid, signal.SIGKILL)
+
+    @staticmethod
+    def _run_child(target):  # pragma: no cover
+        # -- The streams of the parent may be redirected or captured
+        sys.stdout = os.fdopen(1, 'w', 1)
+        sys.stderr = os.fdopen(2, 'w', 1)
+        code = 0
+        try:
+            target()
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                sys.stderr.write('{}\n'.format(e.code))
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        try:
+            # -- The child finishes with os._exit: the exit handlers of
+            # -- the parent are not run, and the streams are flushed here
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except BaseException:
+            code = code or 1
+        return code
+
+
+class NullCapture(object):
+    """Discard the lines of a stream"""
+
+    def append(self, line):
+        pass
+
+    def lines(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class ListCapture(NullCapture):
+    """Keep all the lines of a stream in memory"""
+
+    def __init__(self):
+        self._lines = []
+
+    def append(self, line):
+        self._lines.append(line)
+
+    def lines(self):
+        return self._lines
+
+
+class RingCapture(NullCapture):
+    """Keep only the last `size` lines of a stream"""
+
+    def __init__(self, size=100):
+        self._lines = deque(maxlen=size)
+
+    def append(self, line):
+        self._lines.append(line)
+
+    def lines(self):
+        return list(self._lines)
@@ -4,48 +4,257 @@
 # -- Author Jesús Arroyo
 # -- Licence GPLv2
 
+import os
+import sys
+import json
 import time
 import click
+import shutil
 import datetime
 
-from os.path import join, dirname, isfile
+from os.path import join, dirname, isfile, isdir, relpath, basename
+from glob import glob
+from functools import partial
+from platform import system
+from multiprocessing import cpu_count
 
 from apio import util
 from apio.resources import Resources
 from apio.managers.system import System
 from apio.managers.project import Project
+from apio.managers.runner import Runner, RingCapture
+from apio.managers.renderer import Renderer, JsonRenderer
+from apio.managers.toolchain import Toolchain
+from apio.managers.engine import SConsEngine
+from apio.managers.cache import BuildCache, RemoteCache, input_key
+from apio.managers.report import parse_timing, parse_log, update_report, \
+    REPORT_FILENAME
+from apio.managers.stats import BuildStats, BuildHistory, get_revision
+from apio.managers.sources import Sources
+from apio.managers.builddirs import BUILD_DIR, BUILD_DIRS_FILENAME, \
+    get_build_dirs, add_build_dir, removable
+from apio.managers.estimate import Estimate
+from apio.managers.pins import PinDatabase, check_pcf
 from apio.profile import Profile
 
+# -- Artifacts of the out of tree builds
+SYNTH_DIR = 'synth'
+SEEDS_DIR = 'seeds'
+SCONSIGN_FILENAME = '.sconsign.dblite'
+
+# -- Output lines shown when a quiet build fails
+TAIL_LINES = 20
+
+# -- Artifacts of the best seed copied to the build dir
+SEED_ARTIFACTS = ['hardware.asc', 'hardware.bin', 'hardware.rpt']
+
+# -- Stages run by each command when its targets are out of date
+COMMAND_STAGES = {
+    'build': ['synth', 'pnr', 'pack'],
+    'upload': ['synth', 'pnr', 'pack'],
+    'time': ['synth', 'pnr', 'time'],
+    'verify': ['compile'],
+    'vcd': ['compile', 'sim'],
+    'synth': ['synth'],
+    'pnr': ['pnr'],
+    'pack': ['pack']
+}
+
+# -- Commands that place and route the design, with the pcf file
+PCF_COMMANDS = ('build', 'upload', 'time', 'pnr')
+
+# -- Commands that update build/report.json
+REPORT_COMMANDS = ('build', 'upload', 'time', 'synth', 'pnr', 'pack')
+
+# -- Targets of apio run: scons alias
+RUN_TARGETS = {
+    'build': 'build',
+    'time': 'time',
+    'verify': 'verify',
+    'sim': 'vcd'
+}
+
+# -- Stages of apio build --stage and the upstream artifact they reuse:
+# -- (scons variable, file)
+BUILD_STAGES = ('synth', 'pnr', 'pack')
+STAGE_INPUTS = {
+    'pnr': ('netlist', 'hardware.blif'),
+    'pack': ('layout', 'hardware.asc')
+}
+
+
+def jsonl_output(method):
+    """With `--format jsonl` the events of the builds are the only output
+       of the command in stdout: the messages of apio go to stderr"""
+    def wrapper(self, args, *others):
+        if args.get('format') != 'jsonl':
+            return method(self, args, *others)
+        self._events = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            return method(self, args, *others)
+        finally:
+            sys.stdout = self._events
+            self._events = None
+    return wrapper
+
 
 class SCons(object):
 
     def __init__(self):
         self.resources = Resources()
         self.profile = Profile()
+        self.report = None
+        self._events = None
+        self._engine = None
+        self._toolchain = None
+        # -- Called while a build runs, it is cancelled if it returns True
+        self.cancel = None
+
+    @property
+    def toolchain(self):
+        """Toolchain environment, loaded once per instance"""
+        if self._toolchain is None:
+            self._toolchain = Toolchain()
+        return self._toolchain
 
     def clean(self):
+        self._clean_build_dirs()
         return self.run('-c', deps=['scons'])
 
-    def verify(self):
-        return self.run('verify', deps=['scons', 'iverilog'])
+    @jsonl_output
+    def verify(self, args):
+        return self.run('verify', deps=['scons', 'iverilog'],
+                        quiet=args.get('quiet'), timeout=args.get('timeout'),
+                        stats=args.get('stats'))
 
-    def sim(self):
-        return self.run('sim', deps=['scons', 'iverilog', 'gtkwave'])
+    @jsonl_output
+    def sim(self, args):
+        if not args.get('waves', True):
+            # -- Only the vcd file, without opening gtkwave
+            return self.run('vcd', deps=['scons', 'iverilog'],
+                            quiet=args.get('quiet'),
+                            timeout=args.get('timeout'),
+                            stats=args.get('stats'))
+        return self.run('sim', deps=['scons', 'iverilog', 'gtkwave'],
+                        quiet=args.get('quiet'), timeout=args.get('timeout'),
+                        stats=args.get('stats'))
 
+    @jsonl_output
     def build(self, args):
         ret = self.process_arguments(args)
         if isinstance(ret, int):
             return ret
         if isinstance(ret, tuple):
             variables, board = ret
-        return self.run('build', variables, board, deps=['scons', 'icestorm'])
+        options = self._get_variables(variables, args)
+        if options is None:
+            return 1
+        variables += options
+        if args.get('seeds'):
+            return self.build_seeds(variables, board, args)
+        if args.get('stage'):
+            return self.build_stage(args.get('stage'), variables, board, args)
+        if args.get('estimate') or Project().get_option(
+                'estimate', '').lower() in ('yes', 'true', '1'):
+            # -- Fail fast, before the place and route
+            exit_code = self.synth_estimate(variables, board, args)
+            if exit_code != 0:
+                return exit_code
+        return self.run('build', variables, board, deps=['scons', 'icestorm'],
+                        quiet=args.get('quiet'), timeout=args.get('timeout'),
+                        stats=args.get('stats'))
+
+    def estimate(self, args):
+        ret = self.process_arguments(args)
+        if isinstance(ret, int):
+            return ret
+        if isinstance(ret, tuple):
+            variables, board = ret
+        options = self._get_variables(variables, args)
+        if options is None:
+            return 1
+        variables += options
+        return self.synth_estimate(variables, board, args)
+
+    def synth_estimate(self, variables, board, args):
+        """Synthesize the design and compare its resources usage with the
+           capacities of the FPGA"""
+        exit_code = self.run('synth', variables, board,
+                             deps=['scons', 'icestorm'],
+                             quiet=args.get('quiet'),
+                             timeout=args.get('timeout'),
+                             stats=args.get('stats'))
+        if exit_code != 0:
+            return exit_code
 
+        values = dict(v.split('=', 1) for v in variables if '=' in v)
+        netlist = join(values.get('build_dir') or util.get_project_dir(),
+                       'hardware.blif')
+        estimate = Estimate(self.resources, netlist)
+        if estimate.usage is None:
+            click.secho('Error: netlist not found: {}'.format(
+                relpath(netlist)), fg='red')
+            return 1
+        fpgas = [name for name, fpga in self.resources.fpgas.items()
+                 if fpga['type'] == values.get('fpga_type') and
+                 fpga['size'] == values.get('fpga_size') and
+                 fpga['pack'] == values.get('fpga_pack')]
+        if not fpgas:
+            click.secho('Warning: unknown FPGA capacity, the design fit '
+                        'is not checked', fg='yellow')
+            return 0
+        return estimate.check(fpgas[0])
+
+    def run_targets(self, args):
+        """Run several targets in a single scons pass: the arguments and
+           the toolchain are resolved once and the independent stages run
+           in parallel"""
+        targets = []
+        for target in args['targets']:
+            if target not in RUN_TARGETS:
+                click.secho('Error: unknown target: {}'.format(target),
+                            fg='red')
+                click.secho('Available targets: {}'.format(
+                    ', '.join(sorted(RUN_TARGETS))), fg='yellow')
+                return 1
+            if RUN_TARGETS[target] not in targets:
+                targets.append(RUN_TARGETS[target])
+
+        variables, board = [], None
+        deps = ['scons']
+        if 'build' in targets or 'time' in targets:
+            ret = self.process_arguments(args)
+            if isinstance(ret, int):
+                return ret
+            if isinstance(ret, tuple):
+                variables, board = ret
+            options = self._get_variables(variables, args)
+            if options is None:
+                return 1
+            variables += options
+            deps += ['icestorm']
+        if 'verify' in targets or 'vcd' in targets:
+            deps += ['iverilog']
+        return self.run('run', variables, board, deps=deps,
+                        quiet=args.get('quiet'), timeout=args.get('timeout'),
+                        stats=args.get('stats'), targets=targets,
+                        jobs=args.get('jobs') or cpu_count())
+
+    @jsonl_output
     def upload(self, args, device=-1):
+        quiet = args.get('quiet')
+        timeout = args.get('timeout')
+        stats = args.get('stats')
         ret = self.process_arguments(args)
         if isinstance(ret, int):
             return ret
         if isinstance(ret, tuple):
             variables, board = ret
+        options = self._get_variables(variables, args)
+        if options is None:
+            return 1
+        variables += options
 
         # Get programmer value
         programmer = ''
@@ -141,39 +350,89 @@ class SCons(object):
                         variables + ['device={0}'.format(device),
                                      'prog={0}'.format(programmer)],
                         board,
-                        deps=['scons', 'icestorm'])
+                        deps=['scons', 'icestorm'],
+                        quiet=quiet, timeout=timeout, stats=stats)
 
+    @jsonl_output
     def time(self, args):
+        if not args.get('json'):
+            return self._time(args)
+
+        # -- Only the report is written to stdout, the output of the
+        # -- command goes to stderr
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            exit_code = self._time(args)
+        finally:
+            sys.stdout = stdout
+        if exit_code == 0 and self.report is not None:
+            click.echo(json.dumps(self.report, indent=2, sort_keys=True))
+        return exit_code
+
+    def _time(self, args):
         ret = self.process_arguments(args)
         if isinstance(ret, int):
             return ret
         if isinstance(ret, tuple):
             variables, board = ret
-        return self.run('time', variables, board, deps=['scons', 'icestorm'])
+        options = self._get_variables(variables, args)
+        if options is None:
+            return 1
+        variables += options
+        return self.run('time', variables, board, deps=['scons', 'icestorm'],
+                        quiet=args.get('quiet'), timeout=args.get('timeout'),
+                        stats=args.get('stats'))
 
-    def run(self, command, variables=[], board=None, deps=[]):
-        """Executes scons for building"""
+    def build_stage(self, stage, variables, board, args):
+        """Run the build up to the given stage. The pnr and pack stages
+           start from the existing netlist or layout, even if it is out of
+           date, and only run the previous stages when it does not exist"""
+        if stage not in BUILD_STAGES:
+            click.secho('Error: unknown stage: {}'.format(stage), fg='red')
+            click.secho('Available stages: {}'.format(
+                ', '.join(BUILD_STAGES)), fg='yellow')
+            return 1
+        if stage in STAGE_INPUTS:
+            name, filename = STAGE_INPUTS[stage]
+            build_dir = dict(v.split('=', 1) for v in variables
+                             if '=' in v).get('build_dir')
+            path = join(build_dir or util.get_project_dir(), filename)
+            if isfile(path):
+                click.secho('Info: reuse {}'.format(relpath(path)))
+                variables = variables + ['{0}={1}'.format(name, path)]
+            else:
+                click.secho('Info: {} not found, running the previous '
+                            'stages'.format(relpath(path)))
+        return self.run(stage, variables, board, deps=['scons', 'icestorm'],
+                        quiet=args.get('quiet'), timeout=args.get('timeout'),
+                        stats=args.get('stats'))
 
-        # -- Check for the SConstruct file
-        if not isfile(join(util.get_project_dir(), 'SConstruct')):
-            click.secho('Using default SConstruct file')
-            variables += ['-f', join(
-                dirname(__file__), '..', 'resources', 'SConstruct')]
+    def run(self, command, variables=[], board=None, deps=[], quiet=False,
+            timeout=None, stats=False, targets=None, jobs=None):
+        """Executes scons for building. The scons targets are the command,
+           or the given targets, built in a single pass with `jobs`
+           parallel jobs"""
+        targets = targets or [command]
 
-        # -- Resolve packages
-        if self.profile.check_exe_default():
-            # Run on `default` config mode
-            if not util.resolve_packages(self.resources.packages, deps):
-                # Exit if a package is not installed
-                return 1
+        common = self._prepare(deps)
+        if common is None:
+            return 1
+        if any(t in PCF_COMMANDS for t in targets) and \
+           self._check_pcf(variables) != 0:
+            return 1
+        variables = variables + common
+        options = ['-Q'] + (['-j', str(jobs), '-k'] if jobs else [])
 
         # -- Execute scons
         terminal_width, _ = click.get_terminal_size()
         start_time = time.time()
 
-        if command == 'build' or \
-           command == 'upload' or \
-           command == 'time':
+        if self._events is None and any(
+           t == 'build' or
+           t == 'upload' or
+           t == 'time' or
+           t in BUILD_STAGES for t in targets):
             if board:
                 processing_board = board
             else:
@@ -184,29 +443,95 @@ class SCons(object):
             click.secho('-' * terminal_width, bold=True)
 
         if self.profile.get_verbose_mode() > 0:
-            click.secho('Executing: scons -Q {0} {1}'.format(
-                            command, ' '.join(variables)))
+            click.secho('Executing: scons {0} {1} {2}'.format(
+                            ' '.join(options), ' '.join(targets),
+                            ' '.join(variables)))
+
+        # -- Build cache
+        cache = BuildCache()
+        remote = RemoteCache(cache)
+        cache_debug = join(util.get_project_dir(), '.apio',
+                           'cache-{}.log'.format(os.getpid()))
+        if command != '-c':
+            if remote.enabled:
+                sources = Sources()
+                key = input_key(' '.join(targets), variables,
+                                util.get_project_dir(),
+                                sources.files() if sources.enabled else [])
+                fetched = remote.fetch(key)
+                if fetched:
+                    click.secho(
+                        'Info: {} artifacts downloaded from the cache '
+                        'server'.format(fetched))
+            variables = variables + cache.scons_variables(cache_debug)
+
+        # -- Stages stats: the spawn wrapper only runs when they are shown
+        # -- or recorded in the build history
+        build_stats = BuildStats()
+        history = self.profile.check_history()
+        record = command != '-c' and (stats or history)
+        if record:
+            variables = variables + build_stats.scons_variables()
+
+        if self._events is not None:
+            renderer = JsonRenderer(command, self._events)
+            renderer.emit('start', command=command, board=board)
+        else:
+            renderer = Renderer('clean' if command == '-c' else command,
+                                quiet)
+        # -- In quiet mode the last lines give the context of a failure
+        capture = RingCapture(TAIL_LINES) \
+            if quiet and self._events is None else None
+        exit_code = self._execute_all([(
+            util.scons_command + options + targets + variables,
+            renderer, capture)], self._get_timeouts(timeout))[0].returncode
+        if exit_code != 0 and capture is not None and capture.lines():
+            click.secho('Last lines of the output:', fg='yellow')
+            click.echo('\n'.join(capture.lines()))
+        renderer.close()
+        if record:
+            build_stats.update(command, board, exit_code, start_time,
+                               time.time())
+        if record and history:
+            BuildHistory().add(build_stats.data,
+                               parse_log(renderer.log_path),
+                               get_revision(util.get_project_dir()))
+        if exit_code == 0 and any(t in REPORT_COMMANDS for t in targets):
+            self.report = self._update_report(command, variables, board,
+                                              renderer.log_path)
+
+        hits, misses = cache.update(cache_debug)
+        if hits or misses:
+            click.secho('Info: build cache: {0} hits, {1} misses'.format(
+                hits, misses))
+        if exit_code == 0 and command != '-c' and remote.enabled:
+            remote.push(key, cache.used)
+
+        # -- Report the stages that were up to date
+        stages = []
+        for target in targets:
+            stages += [s for s in COMMAND_STAGES.get(target, [])
+                       if s not in stages]
+        skipped = renderer.skipped(stages)
+        if exit_code == 0 and skipped:
+            click.secho('Info: up to date, skipped stages: {}'.format(
+                ', '.join(skipped)), fg='green')
 
-        result = util.exec_command(
-            util.scons_command + ['-Q', command] + variables,
-            stdout=util.AsyncPipe(self._on_run_out),
-            stderr=util.AsyncPipe(self._on_run_err)
-        )
+        if stats:
+            build_stats.show()
+
+        if len(targets) > 1 and build_stats.data:
+            self._show_targets(targets, build_stats.data['stages'],
+                               exit_code)
+
+        if self._events is not None:
+            renderer.result(command, board, exit_code,
+                            time.time() - start_time, skipped)
+            return exit_code
 
         # -- Print result
-        exit_code = result['returncode']
         is_error = exit_code != 0
-        summary_text = ' Took %.2f seconds ' % (time.time() - start_time)
-        half_line = '=' * int(
-            ((terminal_width - len(summary_text) - 10) / 2))
-        click.echo('%s [%s]%s%s' % (
-            half_line,
-            (click.style(' ERROR ', fg='red', bold=True)
-             if is_error else click.style('SUCCESS', fg='green',
-                                          bold=True)),
-            summary_text,
-            half_line
-        ), err=is_error)
+        self._print_result(is_error, start_time)
 
         if False:
             if is_error:
@@ -230,6 +555,558 @@ class SCons(object):
 
         return exit_code
 
+    def build_matrix(self, args):
+        """Build the project for several boards. The synthesis is run once
+           per FPGA family and the place and route of the boards in
+           parallel. The artifacts of every board are written in
+           build/<board>, and the <board>.pcf file is used if it exists"""
+        boards = [b for b in args['boards'].replace(',', ' ').split()]
+        jobs = args.get('jobs') or cpu_count()
+        root = args.get('build_dir') or \
+            Project().get_option('build_dir', BUILD_DIR)
+        timeouts = self._get_timeouts(args.get('timeout'))
+
+        # -- The project pcf is used by the boards without their own pcf
+        pcfs = sorted(glob(join(util.get_project_dir(), '*.pcf')))
+        board_pcfs = ['{}.pcf'.format(b) for b in self.resources.boards]
+        project_pcf = Project().get_option('pcf')
+        default_pcf = [project_pcf] if project_pcf else \
+            [basename(p) for p in pcfs if basename(p) not in board_pcfs][:1]
+
+        # -- Resolve the boards
+        targets = []
+        for board in boards:
+            if board not in self.resources.boards:
+                click.secho(
+                    'Error: unknown board: {0}'.format(board), fg='red')
+                return 1
+            fpga = self.resources.boards[board]['fpga']
+            pcf = '{}.pcf'.format(board)
+            targets.append({
+                'board': board,
+                'fpga': fpga,
+                'family': self.resources.fpgas[fpga]['type'],
+                'variables': self.format_vars({
+                    'fpga_size': self.resources.fpgas[fpga]['size'],
+                    'fpga_type': self.resources.fpgas[fpga]['type'],
+                    'fpga_pack': self.resources.fpgas[fpga]['pack'],
+                    'pcf': pcf if isfile(pcf) else ''.join(default_pcf),
+                    'build_dir': join(root, board)
+                })
+            })
+            add_build_dir(join(root, board))
+
+        options = self._get_options(args)
+        if options is None:
+            return 1
+        common = self._prepare(['scons', 'icestorm'])
+        if common is None:
+            return 1
+        for t in targets:
+            if self._check_pcf(t['variables'], t['board']) != 0:
+                return 1
+
+        start_time = time.time()
+        cache = BuildCache()
+
+        def command(target, name, variables):
+            return self._command(target, name,
+                                 variables + options + common, cache)
+
+        # -- Synthesis, once per FPGA family
+        families = sorted(set(t['family'] for t in targets))
+        for family in families:
+            add_build_dir(join(root, SYNTH_DIR, family))
+        synths = dict((family, command('synth', family, [
+            'build_dir={}'.format(join(root, SYNTH_DIR, family))]))
+            for family in families)
+        synth_jobs = self._execute_all(
+            [synths[family][:2] for family in families], timeouts, jobs)
+        synthesized = dict((family, job.returncode)
+                           for family, job in zip(families, synth_jobs))
+
+        # -- Place and route and bitstream, per board
+        builds = []
+        for t in targets:
+            if synthesized[t['family']] != 0:
+                continue
+            netlist = join(root, SYNTH_DIR, t['family'], 'hardware.blif')
+            builds.append((t, command('build', t['board'], t['variables'] + [
+                'netlist={}'.format(netlist)])))
+        results = self._execute_all(
+            [cmd[:2] for _, cmd in builds], timeouts, jobs)
+        for (t, cmd), job in zip(builds, results):
+            t['exit_code'] = job.returncode
+            t['elapsed'] = job.elapsed
+            t['renderer'] = cmd[1]
+
+        for _, renderer, cache_debug, _ in list(synths.values()) + \
+                [cmd for _, cmd in builds]:
+            renderer.close(summary=False)
+            cache.update(cache_debug)
+        for family, job in zip(families, synth_jobs):
+            self._record(synths[family], job, 'synth', family)
+        for (t, cmd), job in zip(builds, results):
+            self._record(cmd, job, 'build', t['board'])
+
+        # -- Summary table
+        click.secho('{0:14} {1:20} {2:8} {3:>9}  {4}'.format(
+            'Board', 'FPGA', 'Status', 'Time', 'Log'), bold=True)
+        for t in targets:
+            if 'exit_code' in t:
+                renderer = t['renderer']
+                ok = t['exit_code'] == 0
+                status = 'SUCCESS' if ok else 'ERROR'
+                elapsed = '{:.2f}s'.format(t['elapsed'])
+            else:
+                renderer = synths[t['family']][1]
+                ok = False
+                status = 'SKIPPED'
+                elapsed = '-'
+            click.echo('{0:14} {1:20} {2} {3:>9}  {4}'.format(
+                t['board'], t['fpga'],
+                click.style('{:8}'.format(status),
+                            fg='green' if ok else 'red'),
+                elapsed, relpath(renderer.log_path, util.get_project_dir())))
+
+        is_error = any(t.get('exit_code') != 0 for t in targets)
+        self._print_result(is_error, start_time)
+        return 1 if is_error else 0
+
+    def build_seeds(self, variables, board, args):
+        """Explore the place and route seeds, and option sets, in parallel.
+           The design is synthesized once, every seed is placed, routed and
+           timed in build/seeds/<n>, and the layout of the seed with the
+           highest fmax is packed and copied, with its timing report, to
+           the build dir. The ranking is written in build/seeds/report.txt"""
+        seeds = range(1, args['seeds'] + 1)
+        options = list(args.get('pnr_opts') or []) or ['']
+        jobs = args.get('jobs') or cpu_count()
+        timeouts = self._get_timeouts(args.get('timeout'))
+
+        common = self._prepare(['scons', 'icestorm'])
+        if common is None:
+            return 1
+        if self._check_pcf(variables) != 0:
+            return 1
+
+        fpga = dict(v.split('=', 1) for v in variables)
+        target_dir = fpga.get('build_dir', '')
+        seeds_dir = join(target_dir or BUILD_DIR, SEEDS_DIR)
+        add_build_dir(seeds_dir)
+        base = [v for v in variables if v.split('=', 1)[0] not in (
+            'build_dir', 'seed', 'pnr_opts')]
+        pnr_opts = fpga.get('pnr_opts', '')
+        start_time = time.time()
+        cache = BuildCache()
+
+        # -- Synthesis
+        synth = self._command('synth', 'synth', variables + common, cache)
+        job = self._execute_all([synth[:2]], timeouts)[0]
+        synth[1].close(summary=False)
+        cache.update(synth[2])
+        self._record(synth, job, 'synth', board)
+        if job.returncode != 0:
+            click.secho('Full log: {}'.format(synth[1].log_path))
+            self._print_result(True, start_time)
+            return 1
+
+        # -- Place and route and timing analysis, per seed and options
+        runs = []
+        for seed in seeds:
+            for opts in options:
+                name = 'seed-{0}{1}'.format(
+                    seed, '-{}'.format(options.index(opts))
+                    if len(options) > 1 else '')
+                run_dir = join(seeds_dir, name)
+                run_variables = base + [
+                    'build_dir={}'.format(run_dir),
+                    'netlist={}'.format(join(target_dir, 'hardware.blif')),
+                    'seed={}'.format(seed),
+                    'pnr_opts={}'.format(' '.join(
+                        o for o in (pnr_opts, opts) if o))]
+                runs.append({
+                    'seed': seed,
+                    'opts': opts,
+                    'name': name,
+                    'dir': run_dir,
+                    'variables': run_variables,
+                    'command': self._command('time', name,
+                                             run_variables + common, cache)
+                })
+        finished = self._execute_all(
+            [r['command'][:2] for r in runs], timeouts, jobs)
+        for r, job in zip(runs, finished):
+            r['command'][1].close(summary=False)
+            cache.update(r['command'][2])
+            self._record(r['command'], job, r['name'], board)
+            r['timing'] = parse_timing(join(r['dir'], 'hardware.rpt')) \
+                if job.returncode == 0 else None
+
+        ranked, lines = rank_seeds(runs, join(seeds_dir, 'report.txt'))
+        click.secho(lines[0], bold=True)
+        for line in lines[1:]:
+            click.secho(line, fg=None if 'ERROR' not in line else 'red')
+
+        if not ranked or not ranked[0]['timing']:
+            click.secho('Error: no seed has been placed and routed',
+                        fg='red')
+            self._print_result(True, start_time)
+            return 1
+
+        # -- Pack the layout of the best seed, in its dir, and copy the
+        #    artifacts to the build dir: place and route is not run again
+        best = ranked[0]
+        pack = self._command('pack', best['name'],
+                             best['variables'] + common, cache)
+        job = self._execute_all([pack[:2]], timeouts)[0]
+        pack[1].close(summary=False)
+        cache.update(pack[2])
+        self._record(pack, job, 'pack', board)
+        if job.returncode != 0:
+            click.secho('Full log: {}'.format(pack[1].log_path))
+            self._print_result(True, start_time)
+            return 1
+        dest_dir = target_dir or util.get_project_dir()
+        for name in SEED_ARTIFACTS:
+            shutil.copy2(join(best['dir'], name), join(dest_dir, name))
+        self._update_report('build', variables, board, synth[1].log_path)
+        self.report = self._update_report(
+            'build', variables, board, best['command'][1].log_path)
+
+        click.secho(
+            'Info: best seed {0} ({1:.2f} MHz). Set `seed = {0}`{2} in '
+            'apio.ini to keep it in the next builds'.format(
+                best['seed'], best['timing']['fmax'],
+                ' and add `{}` to `pnr_opts`'.format(best['opts'])
+                if best['opts'] else ''), fg='green')
+        self._print_result(False, start_time)
+        return 0
+
+    def _command(self, target, name, variables, cache):
+        """Scons command of a parallel build: (command, renderer,
+           cache debug log, stats). Only the warnings and errors are shown,
+           tagged with the build name. The stats are None when the build
+           history is disabled"""
+        cache_debug = join(util.get_project_dir(), '.apio',
+                           'cache-{0}-{1}.log'.format(name, os.getpid()))
+        renderer = Renderer('{0}-{1}'.format(target, name), True,
+                            prefix=name)
+        build_stats = BuildStats('{0}-{1}'.format(target, name)) \
+            if self.profile.check_history() else None
+        return (util.scons_command + ['-Q', target] + variables +
+                cache.scons_variables(cache_debug) +
+                (build_stats.scons_variables() if build_stats else []),
+                renderer, cache_debug, build_stats)
+
+    def _record(self, cmd, job, command, board):
+        """Record a finished build of a parallel command, with its closed
+           renderer, in the build history"""
+        build_stats = cmd[3]
+        if build_stats is None or job.start_time is None:
+            return
+        build_stats.update(command, board, job.returncode, job.start_time,
+                           job.end_time or time.time())
+        BuildHistory().add(build_stats.data, parse_log(cmd[1].log_path),
+                           get_revision(util.get_project_dir()))
+
+    def _get_variables(self, variables, args):
+        """Scons variables of the project options: the out of tree build
+           dir, the tools options, the place and route seed and the apio.ini
+           `pcf` file. Returns None if the options are not valid"""
+        options = self._get_options(args)
+        if options is None:
+            return None
+        return self._get_build_dir(variables, args.get('build_dir')) + \
+            options + self.format_vars({'pcf': Project().get_option('pcf')})
+
+    def _get_options(self, args):
+        """Scons variables of the tools options: the flags of the effort
+           profile, set with --profile or the apio.ini `profile` option,
+           followed by the apio.ini `synth_opts`, `pnr_opts`, `pack_opts`
+           and `time_opts` options. Also the apio.ini place and route
+           `seed` and the `hierarchical` synthesis mode"""
+        project = Project()
+        name = args.get('profile') or project.get_option('profile')
+        profile = {}
+        if name:
+            if name not in self.resources.profiles:
+                click.secho('Error: unknown profile: {0}'.format(name),
+                            fg='red')
+                click.secho('Available profiles: {}'.format(
+                    ', '.join(sorted(self.resources.profiles))),
+                    fg='yellow')
+                return None
+            profile = self.resources.profiles[name]
+
+        options = {
+            'seed': project.get_option('seed'),
+            'hierarchical': 'yes' if project.get_option(
+                'hierarchical', '').lower() in ('yes', 'true', '1') else ''
+        }
+        for tool in ('synth', 'pnr', 'pack', 'time'):
+            options['{}_opts'.format(tool)] = ' '.join(
+                flags for flags in [
+                    profile.get(tool),
+                    project.get_option('{}_opts'.format(tool))] if flags)
+        return self.format_vars(options)
+
+    def _check_pcf(self, variables, board=None):
+        """Check the pcf file of the build against the pins of the FPGA
+           package, before running the tools. Returns the exit code"""
+        values = dict(v.split('=', 1) for v in variables if '=' in v)
+        project_dir = util.get_project_dir()
+        pcf = values.get('pcf') or ''.join(
+            basename(p) for p in sorted(glob(join(project_dir, '*.pcf')))[:1])
+        prefix = '[{}] '.format(board) if board else ''
+        if not pcf or not isfile(join(project_dir, pcf)):
+            click.secho('Error: {}no .pcf file found'.format(prefix),
+                        fg='red')
+            return 1
+        # -- Without the apio icestorm package (native mode), the chipdb
+        # -- files of the system tools are used
+        icestorm = self.toolchain.data['packages']['icestorm'] \
+            if self.profile.check_exe_default() else {'dir': ''}
+        pins = PinDatabase(icestorm['dir']).get_pins(
+            values.get('fpga_size'), values.get('fpga_pack'))
+        if pins is None:
+            click.secho('Info: {0}no chipdb of the {1} {2} FPGA, the pins '
+                        'of {3} are not checked'.format(
+                            prefix, values.get('fpga_size'),
+                            values.get('fpga_pack'), pcf))
+        errors = check_pcf(join(project_dir, pcf), pins,
+                           values.get('fpga_pack'))
+        for error in errors:
+            click.secho('Error: {0}{1}'.format(prefix, error), fg='red')
+        return 1 if errors else 0
+
+    def _update_report(self, command, variables, board, log_path):
+        """Update build/report.json, or report.json in the out of tree
+           build dir, with the results of the command"""
+        values = dict(v.split('=', 1) for v in variables if '=' in v)
+        project_dir = util.get_project_dir()
+        target_dir = values.get('build_dir') or project_dir
+        report_dir = values.get('build_dir') or join(project_dir, BUILD_DIR)
+        if not isdir(report_dir):
+            os.makedirs(report_dir)
+        clock = Project().get_option('clock')
+        try:
+            target = float(clock) if clock else None
+        except ValueError:
+            click.secho('Warning: invalid clock in apio.ini: {}'.format(
+                clock), fg='yellow')
+            target = None
+        return update_report(
+            join(report_dir, REPORT_FILENAME), log_path,
+            join(target_dir, 'hardware.rpt'),
+            join(target_dir, 'hardware.asc'), {
+                'command': command,
+                'board': board,
+                'fpga_type': values.get('fpga_type'),
+                'fpga_size': values.get('fpga_size'),
+                'fpga_pack': values.get('fpga_pack')
+            }, target)
+
+    def _get_build_dir(self, variables, build_dir=None):
+        """Scons variable of the out of tree build dir of the FPGA:
+           <root>/<type><size>-<pack>. The root is set with the --build-dir
+           option or the apio.ini `build_dir` option"""
+        root = build_dir or Project().get_option('build_dir')
+        if not root:
+            return []
+        fpga = dict(v.split('=', 1) for v in variables)
+        variant = '{0}{1}-{2}'.format(
+            fpga.get('fpga_type', ''), fpga.get('fpga_size', ''),
+            fpga.get('fpga_pack', '').replace(':', '-'))
+        add_build_dir(join(root, variant))
+        return ['build_dir={}'.format(join(root, variant))]
+
+    def _clean_build_dirs(self):
+        """Remove the out of tree build dirs generated by apio: the FPGA,
+           board and synthesis dirs and the seeds explorations, recorded in
+           .apio/build_dirs.json. Other files in the build root are kept"""
+        project_dir = util.get_project_dir()
+        path = join(project_dir, BUILD_DIRS_FILENAME)
+        for build_dir in get_build_dirs():
+            build_dir = os.path.normpath(join(project_dir, build_dir))
+            if isdir(build_dir) and removable(build_dir, project_dir):
+                shutil.rmtree(build_dir)
+                click.secho('Removed {}'.format(relpath(
+                    build_dir, project_dir)))
+        if isfile(path):
+            os.remove(path)
+
+    def _prepare(self, deps):
+        """Scons variables common to all the builds: the SConstruct file
+           and the toolchain versions. Returns None if a package is not
+           installed"""
+        variables = []
+
+        # -- Check for the SConstruct file
+        if not isfile(join(util.get_project_dir(), 'SConstruct')):
+            click.secho('Using default SConstruct file')
+            variables += ['-f', join(
+                dirname(__file__), '..', 'resources', 'SConstruct')]
+
+        # -- Resolve packages
+        if self.profile.check_exe_default():
+            # Run on `default` config mode
+            toolchain = self.toolchain
+            if not toolchain.resolve(self.resources.packages, deps):
+                # Exit if a package is not installed
+                return None
+            # The artifacts depend on the toolchain version
+            variables += ['toolchain={}'.format(toolchain.get_versions())]
+            if self.profile.check_scons_inprocess():
+                self._engine = SConsEngine.get(
+                    toolchain.data['packages']['scons']['dir'])
+                if self._engine is None:
+                    click.secho('Warning: scons can not run in process, '
+                                'using a subprocess', fg='yellow')
+
+        # -- Sources of the apio.ini source dirs and top module
+        sources = Sources().scons_variables()
+        if sources is None:
+            return None
+        return variables + sources
+
+    def _show_targets(self, targets, records, exit_code):
+        """Summary of the targets of a scons pass: result, stages run and
+           their time. The stages shared by several targets are counted
+           in all of them"""
+        names = dict((alias, name) for name, alias in RUN_TARGETS.items())
+        failed = any(record['exit_code'] for record in records)
+        click.secho('{0:8} {1:8} {2:24} {3:>8}'.format(
+            'Target', 'Result', 'Stages', 'Time'), bold=True)
+        for target in targets:
+            stages = [record for record in records
+                      if _record_target(record, target)]
+            error = any(record['exit_code'] for record in stages) or \
+                (exit_code != 0 and not failed)
+            names_run = []
+            for record in stages:
+                if record['stage'] not in names_run:
+                    names_run.append(record['stage'])
+            click.secho('{0:8} {1:8} {2:24} {3:>7.2f}s'.format(
+                names.get(target, target), 'ERROR' if error else 'SUCCESS',
+                ', '.join(names_run) or 'up to date',
+                sum(record['wall'] for record in stages)),
+                fg='red' if error else 'green')
+
+    def _print_result(self, is_error, start_time):
+        terminal_width, _ = click.get_terminal_size()
+        summary_text = ' Took %.2f seconds ' % (time.time() - start_time)
+        half_line = '=' * int(
+            ((terminal_width - len(summary_text) - 10) / 2))
+        click.echo('%s [%s]%s%s' % (
+            half_line,
+            (click.style(' ERROR ', fg='red', bold=True)
+             if is_error else click.style('SUCCESS', fg='green',
+                                          bold=True)),
+            summary_text,
+            half_line
+        ), err=is_error)
+
+    def _execute_all(self, commands, timeouts, jobs=1):
+        """Run several scons commands, given as (command, renderer) or
+           (command, renderer, capture), at most `jobs` at a time. The
+           capture selects the output lines kept by the job, none by
+           default. The watchdog kills the process group of a command if
+           it, or any of its stages, exceeds its timeout. Returns the
+           finished jobs"""
+        runner = Runner()
+        pending = list(commands)
+        running = []
+
+        def schedule():
+            while pending and len(runner.active) < jobs:
+                item = pending.pop(0)
+                command, renderer = item[:2]
+                capture = item[2] if len(item) > 2 else None
+                if self._engine:
+                    job = runner.fork(
+                        partial(self._engine.main,
+                                command[len(util.scons_command):]),
+                        outcallback=renderer.on_out,
+                        errcallback=renderer.on_err,
+                        timeout=timeouts.get(None),
+                        name=renderer.prefix, capture=capture)
+                else:
+                    job = runner.spawn(command,
+                                       outcallback=renderer.on_out,
+                                       errcallback=renderer.on_err,
+                                       timeout=timeouts.get(None),
+                                       name=renderer.prefix,
+                                       capture=capture,
+                                       shell=system() == 'Windows')
+                running.append((job, renderer))
+
+        def watchdog():
+            if self.cancel and runner.active and self.cancel():
+                runner.cancel()
+            for job, renderer in running:
+                renderer.flush()
+                stage = renderer.stage
+                if job.done or not stage or stage['end'] is not None or \
+                   stage['name'] not in timeouts:
+                    continue
+                if time.time() - stage['start'] > timeouts[stage['name']]:
+                    job.timed_out = True
+                    runner.cancel(job)
+            schedule()
+
+        try:
+            schedule()
+            runner.wait(tick=watchdog)
+        except KeyboardInterrupt:
+            for _, renderer in running:
+                renderer.flush()
+            click.secho('Aborted by user', fg='red')
+            exit(1)
+
+        for job, renderer in running:
+            renderer.flush()
+            if job.timed_out:
+                self._report_timeout(job, renderer, timeouts)
+                # Killed by the watchdog
+                job.returncode = 1
+        return [job for job, _ in running]
+
+    def _report_timeout(self, job, renderer, timeouts):
+        prefix = '[{}] '.format(job.name) if job.name else ''
+        stage = renderer.stage
+        if stage and stage['name'] in timeouts and \
+           time.time() - stage['start'] >= timeouts[stage['name']]:
+            click.secho(
+                '{0}Error: stage {1} timed out after {2:.2f} seconds'.format(
+                    prefix, stage['name'], time.time() - stage['start']),
+                fg='red')
+        else:
+            click.secho(
+                '{0}Error: timed out after {1:.2f} seconds{2}'.format(
+                    prefix, job.elapsed, ', during stage {}'.format(
+                        stage['name']) if stage else ''),
+                fg='red')
+
+    def _get_timeouts(self, timeout=None):
+        """Timeouts in seconds: {None: command, stage: stage}. They are
+           read from the apio.ini `timeout` option and from the --timeout
+           option, with the form `SECONDS` or `STAGE=SECONDS`"""
+        values = [Project().get_option('timeout', '')]
+        values += list(timeout or [])
+
+        timeouts = {}
+        for value in values:
+            for item in value.replace(',', ' ').split():
+                stage, _, seconds = item.rpartition('=')
+                try:
+                    timeouts[stage or None] = float(seconds)
+                except ValueError:
+                    click.secho(
+                        'Warning: invalid timeout: {}'.format(item),
+                        fg='yellow')
+        return timeouts
+
     def process_arguments(self, args):
         # -- Check arguments
         var_board = args['board']
@@ -433,11 +1310,38 @@ class SCons(object):
                 variables += ['{0}={1}'.format(key, value)]
         return variables
 
-    def _on_run_out(self, line):
-        fg = 'green' if 'is up to date' in line else None
-        click.secho(line, fg=fg)
 
-    def _on_run_err(self, line):
-        time.sleep(0.01)  # Delay
-        fg = 'red' if 'error' in line.lower() else 'yellow'
-        click.secho(line, fg=fg)
+def _record_target(record, target):
+    """The stage record belongs to the scons target. The verilog code of
+       verify and of the simulation are both compiled by iverilog, the
+       output of verify is hardware.out"""
+    if record['stage'] not in COMMAND_STAGES.get(target, []):
+        return False
+    if record['stage'] == 'compile':
+        verify = any(basename(arg.strip('"\'')) == 'hardware.out'
+                     for arg in record.get('args', []))
+        return verify == (target == 'verify')
+    return True
+
+
+def rank_seeds(runs, path):
+    """Sort the seed runs by fmax, highest first, with the runs without
+       timing at the end, and write the ranking in the report file.
+       Returns the ranked runs and the lines of the report"""
+    ranked = sorted([r for r in runs if r['timing']],
+                    key=lambda r: -r['timing']['fmax'])
+    ranked += [r for r in runs if not r['timing']]
+    lines = ['{0:5} {1:6} {2:>10} {3:>10}  {4}'.format(
+        'Rank', 'Seed', 'Fmax', 'Delay', 'Options')]
+    for rank, r in enumerate(ranked, 1):
+        timing = r['timing']
+        lines.append('{0:5} {1:6} {2:>10} {3:>10}  {4}'.format(
+            str(rank), str(r['seed']),
+            '{:.2f} MHz'.format(timing['fmax']) if timing else 'ERROR',
+            '{:.2f} ns'.format(timing['delay']) if timing else '-',
+            r['opts'] or '-'))
+    if not isdir(dirname(path)):
+        os.makedirs(dirname(path))
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return ranked, lines
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import json
+import click
+
+from fnmatch import fnmatch
+from os.path import isdir, join, getmtime, relpath, basename, normpath
+
+from apio import util
+from apio.managers.project import Project
+from apio.managers.builddirs import get_artifact_dirs
+
+SOURCES_CACHE = join('.apio', 'sources.json')
+SOURCES_VERSION = 2
+
+# -- Default include globs
+DEFAULT_INCLUDE = ['*.v']
+
+
+class Sources(object):
+    """Verilog sources of a project, set in apio.ini with the `sources`
+       (root dirs), `include` and `exclude` (globs) options of the [env]
+       section. The build dirs are not walked. The directory walk is cached
+       in .apio/sources.json and only repeated when the options change or
+       when the sources and subdirs of a walked dir change, which is only
+       checked if its modification time has changed. Without these options
+       the SConstruct uses the verilog files of the project dir"""
+
+    def __init__(self):
+        project = Project()
+        self.project_dir = util.get_project_dir()
+        self.roots = _split(project.get_option('sources'))
+        self.include = _split(project.get_option('include'))
+        self.exclude = _split(project.get_option('exclude'))
+        self.top = project.get_option('top')
+        self.path = join(self.project_dir, SOURCES_CACHE)
+        self._artifact_dirs = None
+
+    @property
+    def enabled(self):
+        return bool(self.roots or self.include or self.exclude)
+
+    def scons_variables(self):
+        """Scons arguments of the sources list and the top module.
+           Returns None if a source dir does not exist"""
+        variables = []
+        if self.enabled:
+            for root in self.roots:
+                if not isdir(join(self.project_dir, root)):
+                    click.secho(
+                        'Error: source dir not found: {}'.format(root),
+                        fg='red')
+                    return None
+            self.files()
+            variables += ['sources={}'.format(self.path)]
+        if self.top:
+            variables += ['top={}'.format(self.top)]
+        return variables
+
+    def files(self):
+        """Sources paths, relative to the project dir"""
+        data = self._load()
+        if data is None:
+            data = self._walk()
+            self._save(data)
+        return data['files']
+
+    @property
+    def artifact_dirs(self):
+        """Build dirs, relative to the project dir"""
+        if self._artifact_dirs is None:
+            self._artifact_dirs = sorted(
+                _relpath(path, self.project_dir)
+                for path in get_artifact_dirs())
+        return self._artifact_dirs
+
+    def _key(self):
+        return {
+            'version': SOURCES_VERSION,
+            'roots': self.roots or ['.'],
+            'include': self.include or DEFAULT_INCLUDE,
+            'exclude': self.exclude,
+            'build_dirs': self.artifact_dirs
+        }
+
+    def _save(self, data):
+        if not isdir(join(self.project_dir, '.apio')):
+            os.makedirs(join(self.project_dir, '.apio'))
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+
+    def _load(self):
+        """Cached walk, if it is still valid"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return None
+        if data.get('key') != self._key():
+            return None
+        changed = False
+        for rel, (mtime, entries) in data['dirs'].items():
+            path = join(self.project_dir, rel)
+            if not isdir(path):
+                return None
+            if getmtime(path) != mtime:
+                # -- Only other files, as the artifacts, may have changed
+                dirnames, filenames = _listdir(path)
+                if self._entries(rel, dirnames, filenames) != entries:
+                    return None
+                data['dirs'][rel][0] = getmtime(path)
+                changed = True
+        if changed:
+            self._save(data)
+        return data
+
+    def _walk(self):
+        key = self._key()
+        dirs = {}
+        files = set()
+        for root in key['roots']:
+            for path, dirnames, filenames in os.walk(
+                    join(self.project_dir, root)):
+                rel = _relpath(path, self.project_dir)
+                entries = self._entries(rel, dirnames, filenames)
+                dirs[rel] = [getmtime(path), entries]
+                dirnames[:] = [d[:-1] for d in entries if d.endswith('/')]
+                files.update(_join(rel, name) for name in entries
+                             if not name.endswith('/'))
+        return {'key': key, 'dirs': dirs, 'files': sorted(files)}
+
+    def _entries(self, rel, dirnames, filenames):
+        """Walked subdirs, with a trailing /, and sources of a dir. The
+           hidden, excluded and build dirs are skipped"""
+        key = self._key()
+        entries = ['{}/'.format(d) for d in dirnames
+                   if not d.startswith('.') and
+                   not _match(_join(rel, d), key['exclude']) and
+                   _join(rel, d) not in key['build_dirs']]
+        entries += [name for name in filenames
+                    if _match(_join(rel, name), key['include']) and
+                    not _match(_join(rel, name), key['exclude'])]
+        return sorted(entries)
+
+
+def _listdir(path):
+    dirnames, filenames = [], []
+    for name in os.listdir(path):
+        (dirnames if isdir(join(path, name)) else filenames).append(name)
+    return dirnames, filenames
+
+
+def _split(value):
+    return (value or '').replace(',', ' ').split()
+
+
+def _relpath(path, start):
+    path = relpath(normpath(path), start).replace(os.sep, '/')
+    return '' if path == '.' else path
+
+
+def _join(dir, name):
+    return '{0}/{1}'.format(dir, name) if dir else name
+
+
+def _match(path, patterns):
+    """The path, or its file name, matches any of the globs"""
+    return any(fnmatch(path, p) or fnmatch(basename(path), p)
+               for p in patterns)
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import json
+import time
+import click
+import sqlite3
+import subprocess
+
+from os.path import isdir, isfile, join
+
+from apio import util
+from apio.managers.renderer import STAGE_TOOLS
+
+STATS_DIR = join('.apio', 'stats')
+LAST_BUILD_FILENAME = 'last_build.json'
+HISTORY_FILENAME = 'history.db'
+
+# -- Regressions: minimum number of builds of the baseline and minimum
+# -- slowdown, in seconds, to ignore the noise of the short stages
+MIN_BASELINE = 3
+MIN_SLOWDOWN = 0.5
+
+HISTORY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start REAL, project TEXT, command TEXT, board TEXT, revision TEXT,
+    exit_code INTEGER, wall REAL, luts INTEGER, brams INTEGER, fmax REAL);
+CREATE TABLE IF NOT EXISTS stages (
+    build_id INTEGER, stage TEXT, tool TEXT, wall REAL, user REAL,
+    sys REAL, maxrss INTEGER);
+CREATE INDEX IF NOT EXISTS builds_project ON builds (project, command, board);
+CREATE INDEX IF NOT EXISTS stages_build ON stages (build_id);
+'''
+
+
+class BuildStats(object):
+    """Resources used by every stage of a build. The scons spawn wrapper
+       records the wall time, user and sys CPU times, peak RSS and the
+       input and output files sizes of every tool it runs. The stats of
+       the last build are saved in .apio/stats/last_build.json. The
+       builds of a parallel command have a `name` and are not saved"""
+
+    def __init__(self, name=None):
+        self.stats_dir = join(util.get_project_dir(), STATS_DIR)
+        self.records_path = join(self.stats_dir, 'spawn-{}.jsonl'.format(
+            '{0}-{1}'.format(name, os.getpid()) if name else os.getpid()))
+        self.last_build_path = None if name else \
+            join(self.stats_dir, LAST_BUILD_FILENAME)
+        self.data = None
+
+    def scons_variables(self):
+        """Scons arguments that enable the spawn wrapper"""
+        if not isdir(self.stats_dir):
+            os.makedirs(self.stats_dir)
+        if isfile(self.records_path):
+            os.remove(self.records_path)
+        return ['stats={}'.format(self.records_path)]
+
+    def update(self, command, board, exit_code, start_time, end_time):
+        """Collect the stages records and save the build stats"""
+        stages = []
+        if isfile(self.records_path):
+            with open(self.records_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    record['stage'] = STAGE_TOOLS.get(record['tool'],
+                                                      record['tool'])
+                    stages.append(record)
+            os.remove(self.records_path)
+
+        self.data = {
+            'command': command,
+            'board': board,
+            'exit_code': exit_code,
+            'start': start_time,
+            'wall': end_time - start_time,
+            'stages': stages
+        }
+        if self.last_build_path and isdir(self.stats_dir):
+            with open(self.last_build_path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+        return self.data
+
+    def show(self):
+        if not self.data['stages']:
+            click.secho('Info: no stage has been run')
+            return
+        click.secho('{0:8} {1:12} {2:>8} {3:>8} {4:>8} {5:>10} {6:>10} '
+                    '{7:>10}'.format('Stage', 'Tool', 'Wall', 'User', 'Sys',
+                                     'Peak RSS', 'Input', 'Output'),
+                    bold=True)
+        for stage in self.data['stages']:
+            click.secho('{0:8} {1:12} {2:>8} {3:>8} {4:>8} {5:>10} {6:>10} '
+                        '{7:>10}'.format(
+                            stage['stage'], stage['tool'],
+                            _seconds(stage['wall']),
+                            _seconds(stage.get('user')),
+                            _seconds(stage.get('sys')),
+                            _size(stage.get('maxrss'), 1024),
+                            _size(sum(stage['inputs'].values())),
+                            _size(sum(stage['outputs'].values()))),
+                        fg='red' if stage['exit_code'] else None)
+        click.secho('Stats: {}'.format(self.last_build_path))
+
+
+class BuildHistory(object):
+    """Database of the builds of all the projects, in the apio home dir.
+       When the history is enabled, every scons command, and every build
+       of the parallel commands, is recorded with its stages durations,
+       exit code, utilization and fmax. A stage has regressed when it is slower
+       than the median of the previous builds by more than a threshold"""
+
+    def __init__(self, path=None):
+        self.path = path or join(util.get_home_dir(), HISTORY_FILENAME)
+        self._db = None
+
+    def add(self, data, report, revision=None):
+        """Record a build: the BuildStats data and the parse_log report"""
+        try:
+            db = self._connect()
+            with db:
+                build_id = db.execute(
+                    'INSERT INTO builds (start, project, command, board, '
+                    'revision, exit_code, wall, luts, brams, fmax) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                        data['start'], util.get_project_dir(),
+                        data['command'], data['board'], revision,
+                        data['exit_code'], data['wall'], report['luts'],
+                        report['brams'], report['fmax'])).lastrowid
+                db.executemany(
+                    'INSERT INTO stages (build_id, stage, tool, wall, user, '
+                    'sys, maxrss) VALUES (?, ?, ?, ?, ?, ?, ?)', [
+                        (build_id, stage['stage'], stage['tool'],
+                         stage['wall'], stage.get('user'), stage.get('sys'),
+                         stage.get('maxrss'))
+                        for stage in data['stages']])
+        except sqlite3.Error as e:
+            click.secho('Warning: build history not saved: {}'.format(e),
+                        fg='yellow')
+
+    def get_builds(self, project, limit=10):
+        """Last builds of the project, the newest first"""
+        rows = self._connect().execute(
+            'SELECT id, start, command, board, revision, exit_code, wall, '
+            'luts, brams, fmax FROM builds WHERE project = ? '
+            'ORDER BY id DESC LIMIT ?', (project, limit)).fetchall()
+        keys = ('id', 'start', 'command', 'board', 'revision', 'exit_code',
+                'wall', 'luts', 'brams', 'fmax')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get_regressions(self, project, window=10, threshold=25):
+        """Stages of the last successful build of every command and board
+           of the project that are `threshold` percent slower than the
+           median of the previous `window` successful builds"""
+        db = self._connect()
+        regressions = []
+        for command, board in db.execute(
+                'SELECT DISTINCT command, board FROM builds '
+                'WHERE project = ? ORDER BY command, board', (project,)):
+            ids = [row[0] for row in db.execute(
+                'SELECT id FROM builds WHERE project = ? AND command = ? '
+                'AND board IS ? AND exit_code = 0 ORDER BY id DESC LIMIT ?',
+                (project, command, board, window + 1))]
+            if len(ids) < MIN_BASELINE + 1:
+                continue
+            last = self._get_stages(ids[0])
+            previous = [self._get_stages(i) for i in ids[1:]]
+            for stage, wall in sorted(last.items()):
+                samples = sorted(p[stage] for p in previous if stage in p)
+                if len(samples) < MIN_BASELINE:
+                    continue
+                baseline = samples[len(samples) // 2]
+                if wall - baseline >= MIN_SLOWDOWN and \
+                   wall > baseline * (1 + threshold / 100.0):
+                    regressions.append({
+                        'command': command,
+                        'board': board,
+                        'stage': stage,
+                        'wall': wall,
+                        'baseline': baseline,
+                        'builds': len(samples)
+                    })
+        return regressions
+
+    def show(self, project, limit=10, window=10, threshold=25):
+        """List the last builds of the project and its regressions.
+           Returns the number of regressions"""
+        builds = self.get_builds(project, limit)
+        if not builds:
+            click.secho('Info: no builds recorded for {}'.format(project))
+            return 0
+        stages = dict((b['id'], self._get_stages(b['id'])) for b in builds)
+        names = [name for name in ('synth', 'pnr', 'pack', 'time', 'compile',
+                                   'sim')
+                 if any(name in s for s in stages.values())]
+
+        click.secho('{0:19} {1:7} {2:12} {3:12} {4:>4} {5:>8} {6}{7:>6} '
+                    '{8:>6} {9:>8}'.format(
+                        'Date', 'Command', 'Board', 'Revision', 'Exit',
+                        'Time', ''.join('{:>8} '.format(n) for n in names),
+                        'LUTs', 'BRAMs', 'Fmax'), bold=True)
+        for b in reversed(builds):
+            click.secho('{0:19} {1:7} {2:12} {3:12} {4:>4} {5:>8} {6}{7:>6} '
+                        '{8:>6} {9:>8}'.format(
+                            time.strftime('%Y-%m-%d %H:%M:%S',
+                                          time.localtime(b['start'])),
+                            b['command'], b['board'] or '-',
+                            b['revision'] or '-', str(b['exit_code']),
+                            _seconds(b['wall']),
+                            ''.join('{:>8} '.format(
+                                _seconds(stages[b['id']].get(n)))
+                                for n in names),
+                            _value(b['luts']), _value(b['brams']),
+                            _value(b['fmax'], '{:.2f}')),
+                        fg='red' if b['exit_code'] else None)
+
+        regressions = self.get_regressions(project, window, threshold)
+        for r in regressions:
+            click.secho(
+                'Warning: {0} {1}: stage {2} took {3:.2f}s, {4:.0f}% slower '
+                'than the baseline of {5:.2f}s (median of {6} builds)'.format(
+                    r['command'], r['board'] or '', r['stage'], r['wall'],
+                    100.0 * (r['wall'] / r['baseline'] - 1),
+                    r['baseline'], r['builds']), fg='yellow')
+        if not regressions:
+            click.secho('No performance regressions', fg='green')
+        return len(regressions)
+
+    def _get_stages(self, build_id):
+        """{stage: wall} of a build"""
+        stages = {}
+        for stage, wall in self._connect().execute(
+                'SELECT stage, wall FROM stages WHERE build_id = ?',
+                (build_id,)):
+            stages[stage] = stages.get(stage, 0) + wall
+        return stages
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=5)
+            self._db.executescript(HISTORY_SCHEMA)
+        return self._db
+
+
+def get_revision(project_dir):
+    """Git revision of the project, or None"""
+    try:
+        with open(os.devnull, 'w') as devnull:
+            revision = subprocess.check_output(
+                ['git', 'describe', '--always', '--dirty'],
+                cwd=project_dir, stderr=devnull)
+        return revision.decode('utf-8').strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _seconds(value):
+    return '-' if value is None else '{:.2f}s'.format(value)
+
+
+def _value(value, fmt='{}'):
+    return '-' if value is None else fmt.format(value)
+
+
+def _size(value, unit=1):
+    """Human readable size of value * unit bytes"""
+    if value is None:
+        return '-'
+    value *= unit
+    for suffix in ('B', 'KB', 'MB'):
+        if value < 1024:
+            return '{0:.1f} {1}'.format(value, suffix) if suffix != 'B' \
+                else '{0} {1}'.format(value, suffix)
+        value /= 1024.0
+    return '{:.1f} GB'.format(value)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import sys
+import json
+import click
+
+from os.path import isdir, isfile, join, getmtime, normpath
+from platform import system
+
+from apio import util
+from apio.profile import Profile
+
+TOOLCHAIN_FILENAME = 'toolchain.json'
+
+# -- PATH entries added by the last apply in this process
+_applied_path = []
+
+# -- Apio package: (release name, binaries dir)
+TOOLCHAIN_PACKAGES = {
+    'scons': ('tool-scons', 'script'),
+    'icestorm': ('toolchain-icestorm', 'bin'),
+    'iverilog': ('toolchain-iverilog', 'bin'),
+    'gtkwave': ('tool-gtkwave', 'bin')
+}
+
+
+class Toolchain(object):
+    """Resolved toolchain environment: package paths and versions, PATH
+       entries, environment variables and scons command. It is computed
+       once, persisted in the apio home dir and only recomputed when a
+       package is installed or removed, or its dir modification time
+       changes"""
+
+    def __init__(self):
+        self._path = join(util.get_home_dir(), TOOLCHAIN_FILENAME)
+        self.data = self.load()
+
+    def load(self):
+        data = None
+        if isfile(self._path):
+            with open(self._path, 'r') as f:
+                try:
+                    data = json.load(f)
+                except ValueError:
+                    data = None
+        if not self._is_valid(data):
+            data = self.update()
+        return data
+
+    def update(self):
+        """Compute and save the toolchain environment"""
+        self.data = self._compute()
+        try:
+            with open(self._path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+        except IOError:  # pragma: no cover
+            pass
+        return self.data
+
+    def resolve(self, packages, deps=[]):
+        """Check the deps packages and load the toolchain environment"""
+        check = True
+        for name in deps:
+            if name in packages:
+                check &= util._check_package(
+                    name, self.data['packages'][name]['bin_dir'])
+        if check:
+            self.apply()
+        return check
+
+    def apply(self):
+        """Load the toolchain environment in the current process. It can
+           be called several times: the entries added before are replaced"""
+        global _applied_path
+        # Give the priority to the packages installed by apio
+        path = [p for p in os.environ.get('PATH', '').split(os.pathsep)
+                if p and p not in _applied_path and p not in self.data['path']]
+        os.environ['PATH'] = os.pathsep.join(self.data['path'] + path)
+        _applied_path = list(self.data['path'])
+        os.environ.update(self.data['env'])
+        util.scons_command = self.data['scons_command']
+
+    def get_versions(self):
+        """Installed packages versions: name@version,..."""
+        return ','.join(
+            '{0}@{1}'.format(name, package['version'])
+            for name, package in sorted(self.data['packages'].items())
+            if package['version'])
+
+    def list(self):
+        for name in sorted(self.data['packages']):
+            package = self.data['packages'][name]
+            click.secho('{0:10} {1:8} {2}'.format(
+                name, package['version'] or '-',
+                package['dir'] or 'not installed'),
+                fg='yellow' if package['dir'] else None)
+        for key, value in sorted(self.data['env'].items()):
+            click.secho('{0}={1}'.format(key, value))
+
+    def shell_script(self):
+        """Commands that load the toolchain environment in a shell"""
+        lines = []
+        if system() == 'Windows':
+            lines += ['set PATH={0};%PATH%'.format(
+                os.pathsep.join(self.data['path']))]
+            lines += ['set {0}={1}'.format(k, v)
+                      for k, v in sorted(self.data['env'].items())]
+        else:
+            lines += ['export PATH="{0}:$PATH"'.format(
+                os.pathsep.join(self.data['path']))]
+            lines += ['export {0}="{1}"'.format(k, v)
+                      for k, v in sorted(self.data['env'].items())]
+        return lines
+
+    def _key(self):
+        return {
+            'home_dir': util._get_projconf_option_dir('home_dir', ''),
+            'pkg_dir': util._get_projconf_option_dir('pkg_dir', ''),
+            'config': bool(util.config_data),
+            'python': normpath(sys.executable)
+        }
+
+    def _is_valid(self, data):
+        if not data or data.get('key') != self._key():
+            return False
+        for name, package in data['packages'].items():
+            # -- The missing packages may have been installed since
+            release_name = TOOLCHAIN_PACKAGES[name][0]
+            if package['dir'] != util.get_package_dir(release_name) or \
+               package['mtime'] != self._mtime(package['dir']):
+                return False
+        return True
+
+    def _mtime(self, path):
+        return getmtime(path) if path and isdir(path) else None
+
+    def _compute(self):
+        profile = Profile()
+        packages = {}
+        for name, (release_name, bin_name) in TOOLCHAIN_PACKAGES.items():
+            base_dir = util.get_package_dir(release_name)
+            version = None
+            if name in profile.packages or \
+               isfile(join(base_dir, 'package.json')):
+                version = profile.get_package_version(name, release_name)
+            packages[name] = {
+                'dir': base_dir,
+                'bin_dir': join(base_dir, bin_name) if base_dir else '',
+                'version': version,
+                'mtime': self._mtime(base_dir)
+            }
+
+        env = {}
+        iverilog_dir = packages['iverilog']['dir']
+        if iverilog_dir:
+            if not util.config_data:  # /etc/apio.json file does not exist
+                env['IVL'] = join(iverilog_dir, 'lib', 'ivl')
+            env['VLIB'] = join(iverilog_dir, 'vlib', 'system.v')
+
+        return {
+            'key': self._key(),
+            'packages': packages,
+            'path': [packages[name]['bin_dir']
+                     for name in ('icestorm', 'iverilog', 'gtkwave')
+                     if packages[name]['bin_dir']],
+            'env': env,
+            'scons_command': [normpath(sys.executable),
+                              join(packages['scons']['bin_dir'], 'scons')]
+        }
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016 FPGAwars
+# -- Author Jesús Arroyo
+# -- Licence GPLv2
+
+import os
+import time
+import click
+import struct
+import select
+import ctypes
+import ctypes.util
+import datetime
+
+from fnmatch import fnmatch
+from functools import partial
+from os.path import isdir, join, getmtime, relpath, normpath, basename
+from platform import system
+
+from apio import util
+from apio.managers.scons import SCons, BUILD_DIR
+from apio.managers.project import Project
+
+# -- Files that never trigger a build: artifacts, editor backups and
+# -- temporary files
+IGNORE = ['hardware.*', '*.out', '*.vcd', '*.rpt', '*.log', '*.pyc', '*~',
+          '*.swp', '*.swx', '4913', '#*#', '.*']
+
+# -- inotify(7) constants
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+IN_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | \
+    IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Watch(object):
+    """Run a build target again every time the project files change. The
+       saves are debounced, a run in progress is cancelled when new
+       changes arrive and the resources and the toolchain stay loaded
+       between runs"""
+
+    def __init__(self, target, args, delay=0.3):
+        self.target = target
+        self.args = args
+        self.delay = delay
+        self.scons = SCons()
+        self._last_check = 0
+        self.watcher = get_watcher(
+            util.get_project_dir(), args.get('build_dir') or
+            Project().get_option('build_dir', BUILD_DIR))
+
+    def run(self):
+        click.secho('Watching {0} for changes ({1}), press Ctrl+C to '
+                    'stop'.format(util.get_project_dir(),
+                                  self.watcher.name), fg='cyan')
+        exit_code = self._build()
+        try:
+            while True:
+                changes = self._wait(self.watcher.poll())
+                if changes:
+                    exit_code = self._build(changes)
+        except KeyboardInterrupt:
+            click.secho('Stopped', fg='cyan')
+        finally:
+            self.watcher.close()
+        return exit_code
+
+    def _build(self, changes=()):
+        while True:
+            if changes:
+                click.secho('[{0}] Changed: {1}'.format(
+                    datetime.datetime.now().strftime('%X'),
+                    ', '.join(sorted(changes))), fg='cyan')
+            pending = set()
+            self.scons.cancel = partial(self._changed, pending)
+            try:
+                exit_code = self._run_target()
+            finally:
+                self.scons.cancel = None
+            if not pending:
+                return exit_code
+            click.secho('Info: files changed, {} cancelled'.format(
+                self.target), fg='yellow')
+            changes = self._wait(pending)
+
+    def _run_target(self):
+        if self.target == 'build':
+            return self.scons.build(self.args)
+        if self.target == 'verify':
+            return self.scons.verify(self.args)
+        return self.scons.sim(dict(self.args, waves=False))
+
+    def _changed(self, pending):
+        """Add the changes made during a build to `pending`. The watcher
+           is checked at most once per interval, so that the polling
+           watcher does not scan the project on every tick of the build"""
+        now = time.time()
+        if now - self._last_check >= self.watcher.interval:
+            self._last_check = now
+            pending.update(self.watcher.poll(0))
+        return bool(pending)
+
+    def _wait(self, changes):
+        """Wait until there are no more changes in `delay` seconds"""
+        changes = set(changes)
+        while True:
+            more = self.watcher.poll(self.delay)
+            if not more:
+                return changes
+            changes |= more
+
+
+def get_watcher(path, build_dir=BUILD_DIR):
+    """inotify watcher on Linux, if available, or a polling watcher"""
+    if system() == 'Linux':
+        try:
+            return InotifyWatcher(path, build_dir)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(path, build_dir)
+
+
+class PollingWatcher(object):
+    """Changes of the project files, from their modification times. The
+       build dir, relative to the project dir or absolute, is not
+       watched"""
+
+    name = 'polling'
+
+    def __init__(self, path, build_dir=BUILD_DIR, interval=0.5):
+        self.path = path
+        self.build_dir = normpath(join(path, build_dir))
+        self.interval = interval
+        self._files = self._scan()
+
+    def poll(self, timeout=None):
+        """Paths changed, relative to the project dir. Waits for changes
+           at most `timeout` seconds, or forever if it is None"""
+        start = time.time()
+        while True:
+            time.sleep(self.interval if timeout is None else
+                       min(self.interval, timeout))
+            files = self._scan()
+            changes = set(
+                name for name in set(files) | set(self._files)
+                if files.get(name) != self._files.get(name))
+            self._files = files
+            if changes or (timeout is not None and
+                           time.time() - start >= timeout):
+                return changes
+
+    def close(self):
+        pass
+
+    def dirs(self, root=None):
+        """Watched dirs under the root: the project dir, without the hidden
+           and the build dirs"""
+        root = root or self.path
+        if self._excluded(root):
+            return
+        for path, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames
+                           if not self._excluded(join(path, d))]
+            yield path
+
+    def _excluded(self, path):
+        path = normpath(path)
+        if path == normpath(self.path):
+            return False
+        return basename(path).startswith('.') or path == self.build_dir
+
+    def _scan(self):
+        files = {}
+        for path in self.dirs():
+            for name in os.listdir(path):
+                filename = join(path, name)
+                if not isdir(filename) and watched(name):
+                    try:
+                        files[relpath(filename, self.path)] = \
+                            getmtime(filename)
+                    except OSError:  # pragma: no cover
+                        pass
+        return files
+
+
+class InotifyWatcher(PollingWatcher):
+    """Changes of the project files, from the inotify events of the
+       kernel. Only on Linux"""
+
+    name = 'inotify'
+
+    def __init__(self, path, build_dir=BUILD_DIR):
+        self.path = path
+        self.interval = 0
+        self.build_dir = normpath(join(path, build_dir))
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                                 use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        self._dirs = {}
+        for path in self.dirs():
+            self._add(path)
+
+    def poll(self, timeout=None):
+        changes = set()
+        start = time.time()
+        while not changes:
+            left = None if timeout is None else \
+                max(0, timeout - (time.time() - start))
+            readable, _, _ = select.select([self._fd], [], [], left)
+            if not readable:
+                break
+            changes |= self._read()
+        return changes
+
+    def close(self):
+        os.close(self._fd)
+
+    def _add(self, path):
+        wd = self._libc.inotify_add_watch(
+            self._fd, path.encode('utf-8'), IN_MASK)
+        if wd >= 0:
+            self._dirs[wd] = path
+
+    def _read(self):
+        changes = set()
+        try:
+            data = os.read(self._fd, 65536)
+        except OSError:  # pragma: no cover
+            return changes
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, size = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + size].rstrip(b'\0').decode(
+                'utf-8', 'replace')
+            offset += size
+            if mask & IN_Q_OVERFLOW:
+                # -- Events lost: everything may have changed
+                changes.add('.')
+                continue
+            if wd not in self._dirs or not name:
+                continue
+            path = join(self._dirs[wd], name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # -- The files created before the watch are reported
+                    for path in self.dirs(path):
+                        self._add(path)
+                        changes.update(
+                            relpath(join(path, name), self.path)
+                            for name in os.listdir(path)
+                            if watched(name) and
+                            not isdir(join(path, name)))
+                continue
+            if watched(name):
+                changes.add(relpath(path, self.path))
+        return changes
+
+
+def watched(name):
+    return not any(fnmatch(name, pattern) for pattern in IGNORE)
@@ -16,8 +16,10 @@ from apio.util import get_home_dir, get_package_dir
 class Profile(object):
 
     def __init__(self):
-        self.config = {'exe': 'default', 'verbose': 0}
-        self.labels = {'exe': 'Executable', 'verbose': 'Verbose'}
+        self.config = {'exe': 'default', 'verbose': 0, 'scons': 'subprocess',
+                       'history': 'off'}
+        self.labels = {'exe': 'Executable', 'verbose': 'Verbose',
+                       'scons': 'SCons', 'history': 'History'}
         self.packages = {}
         self._profile_path = join(get_home_dir(), 'profile.json')
         self.load()
@@ -48,6 +50,12 @@ class Profile(object):
     def check_exe_default(self):
         return self.config['exe'] == 'default'
 
+    def check_scons_inprocess(self):
+        return self.config['scons'] == 'inprocess'
+
+    def check_history(self):
+        return self.config['history'] == 'on'
+
     def add_package(self, name, version):
         self.packages[name] = {'version': version}
 
@@ -96,6 +104,10 @@ class Profile(object):
                             self.config['exe'] = 'default'
                         if 'verbose' not in self.config.keys():
                             self.config['verbose'] = 0
+                        if 'scons' not in self.config.keys():
+                            self.config['scons'] = 'subprocess'
+                        if 'history' not in self.config.keys():
+                            self.config['history'] = 'off'
                     if 'packages' in data.keys():
                         self.packages = data['packages']
                     else:
@@ -25,6 +25,7 @@ class Resources(object):
         self.fpgas = self._load_resource('fpgas')
         self.programmers = self._load_resource('programmers')
         self.distribution = self._load_resource('distribution')
+        self.profiles = self._load_resource('profiles')
 
         # Check available packages
         self.packages = self._check_packages(self.packages, platform)
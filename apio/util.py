@@ -10,13 +10,13 @@
 
 import os
 import re
-import sys
 import json
 import click
 import subprocess
-from os.path import expanduser, join, isdir, isfile, normpath
+from os.path import expanduser, join, isdir, isfile
 from platform import system, uname
-from threading import Thread
+
+from apio.managers.runner import Runner, ListCapture
 
 import requests
 requests.packages.urllib3.disable_warnings()
@@ -41,37 +41,28 @@ class ApioException(Exception):
             return Exception.__str__(self)
 
 
-class AsyncPipe(Thread):  # pragma: no cover
+class AsyncPipe(object):
+    """Output sink for exec_command. The lines of the stream are read by
+       a Runner and given to the outcallback as they arrive. The capture
+       object selects what is kept: all the lines (default), none or the
+       last lines (RingCapture)"""
 
-    def __init__(self, outcallback=None):
-        Thread.__init__(self)
+    def __init__(self, outcallback=None, capture=None):
         self.outcallback = outcallback
-
-        self._fd_read, self._fd_write = os.pipe()
-        self._pipe_reader = os.fdopen(self._fd_read)
-        self._buffer = []
-
-        self.start()
+        self.capture = capture if capture is not None else ListCapture()
 
     def get_buffer(self):
-        return self._buffer
-
-    def fileno(self):
-        return self._fd_write
-
-    def run(self):
-        for line in iter(self._pipe_reader.readline, ''):
-            line = line.strip()
-            self._buffer.append(line)
-            if self.outcallback:
-                self.outcallback(line)
-            else:
-                print(line)
-        self._pipe_reader.close()
+        return self.capture.lines()
 
     def close(self):
-        os.close(self._fd_write)
-        self.join()
+        self.capture.close()
+
+    def feed(self, line):
+        self.capture.append(line)
+        if self.outcallback:
+            self.outcallback(line)
+        else:
+            print(line)
 
 
 def get_systype():
@@ -152,50 +143,6 @@ def get_project_dir():
 scons_command = ['scons']
 
 
-def resolve_packages(packages, deps=[]):
-
-    base_dir = {
-        'scons': get_package_dir('tool-scons'),
-        'icestorm': get_package_dir('toolchain-icestorm'),
-        'iverilog': get_package_dir('toolchain-iverilog'),
-        'gtkwave': get_package_dir('tool-gtkwave')
-    }
-
-    bin_dir = {
-        'scons': join(base_dir['scons'], 'script'),
-        'icestorm': join(base_dir['icestorm'], 'bin'),
-        'iverilog': join(base_dir['iverilog'], 'bin'),
-        'gtkwave': join(base_dir['gtkwave'], 'bin')
-    }
-
-    # -- Check packages
-    check = True
-    for package in deps:
-        if package in packages:
-            check &= _check_package(package, bin_dir[package])
-
-    # -- Load packages
-    if check:
-
-        # Give the priority to the packages installed by apio
-        os.environ['PATH'] = os.pathsep.join(
-            [bin_dir['icestorm'], bin_dir['iverilog'], bin_dir['gtkwave'],
-             os.environ['PATH']])
-
-        # Add environment variables
-        if not config_data:  # /etc/apio.json file does not exist
-            os.environ['IVL'] = join(
-                base_dir['iverilog'], 'lib', 'ivl')
-        os.environ['VLIB'] = join(
-            base_dir['iverilog'], 'vlib', 'system.v')
-
-        global scons_command
-        scons_command = [normpath(sys.executable),
-                         join(bin_dir['scons'], 'scons')]
-
-    return check
-
-
 def _check_package(name, path=''):
     is_dir = isdir(path)
     if not is_dir:
@@ -235,7 +182,8 @@ def exec_command(*args, **kwargs):  # pragma: no cover
     result = {
         'out': None,
         'err': None,
-        'returncode': None
+        'returncode': None,
+        'timeout': False
     }
 
     default = dict(
@@ -246,10 +194,28 @@ def exec_command(*args, **kwargs):  # pragma: no cover
     default.update(kwargs)
     kwargs = default
 
+    pipes = dict((s, kwargs[s]) for s in ('stdout', 'stderr')
+                 if isinstance(kwargs[s], AsyncPipe))
+    timeout = kwargs.pop('timeout', None)
+
     try:
-        p = subprocess.Popen(*args, **kwargs)
-        result['out'], result['err'] = p.communicate()
-        result['returncode'] = p.returncode
+        if pipes or timeout:
+            # -- Multiplex the outputs in this thread
+            for s in ('stdout', 'stderr'):
+                kwargs.pop(s)
+                pipes.setdefault(s, AsyncPipe(lambda line: None))
+            runner = Runner()
+            job = runner.spawn(*args,
+                               outcallback=pipes['stdout'].feed,
+                               errcallback=pipes['stderr'].feed,
+                               timeout=timeout, **kwargs)
+            runner.wait(job)
+            result['returncode'] = job.returncode
+            result['timeout'] = job.timed_out
+        else:
+            p = subprocess.Popen(*args, **kwargs)
+            result['out'], result['err'] = p.communicate()
+            result['returncode'] = p.returncode
     except KeyboardInterrupt:
         click.secho('Aborted by user', fg='red')
         exit(1)
@@ -257,13 +223,11 @@ def exec_command(*args, **kwargs):  # pragma: no cover
         click.secho(str(e), fg='red')
         exit(1)
     finally:
-        for s in ('stdout', 'stderr'):
-            if isinstance(kwargs[s], AsyncPipe):
-                kwargs[s].close()
+        for pipe in pipes.values():
+            pipe.close()
 
-    for s in ('stdout', 'stderr'):
-        if isinstance(kwargs[s], AsyncPipe):
-            result[s[3:]] = '\n'.join(kwargs[s].get_buffer())
+    for s in pipes:
+        result[s[3:]] = '\n'.join(pipes[s].get_buffer())
 
     for k, v in result.items():
         if v and isinstance(v, unicode):
@@ -21,6 +21,87 @@ def test_build_board(clirunner, configenv):
             assert 'install scons' in result.output
 
 
+def test_build_quiet(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, ['--board', 'icezum', '--quiet'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'install icestorm' in result.output
+
+
+def test_build_boards(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, ['--boards', 'icestick,icezum'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'install icestorm' in result.output
+
+        result = clirunner.invoke(cmd_build, ['--boards', 'icestick,foo'])
+        assert result.exit_code == 1
+        assert 'Error: unknown board: foo' in result.output
+
+        result = clirunner.invoke(cmd_build, [
+            '--boards', 'icestick,icezum', '--board', 'icezum'])
+        assert result.exit_code == 1
+        assert 'Error: --boards can not be used with' in result.output
+
+
+def test_build_dir(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, [
+            '--board', 'icezum', '--build-dir', 'build'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'install icestorm' in result.output
+
+
+def test_build_seeds(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, [
+            '--board', 'icezum', '--seeds', '4', '--pnr-opts', '-r',
+            '--jobs', '2'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'install icestorm' in result.output
+
+
+def test_build_stats(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, ['--board', 'icezum', '--stats'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'install icestorm' in result.output
+
+
+def test_build_profile(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, [
+            '--board', 'icezum', '--profile', 'unknown'])
+        assert result.exit_code == 1
+        assert 'Error: unknown profile: unknown' in result.output
+
+
+def test_build_stage(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, [
+            '--board', 'icezum', '--stage', 'pnr'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'install icestorm' in result.output
+
+        result = clirunner.invoke(cmd_build, ['--seeds', '4', '--stage',
+                                              'synth'])
+        assert result.exit_code == 1
+        assert 'Error: --stage can not be used' in result.output
+
+
 def test_build_complete(clirunner, configenv):
     with clirunner.isolated_filesystem():
         configenv()
@@ -187,3 +268,13 @@ def test_build_init(clirunner, configenv):
         assert result.exit_code != 0
         assert 'Info: ignore apio.ini board' in result.output
         assert 'Error: insufficient arguments: missing pack' in result.output
+
+
+def test_build_format_jsonl_boards(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_build, [
+            '--boards', 'icezum,icestick', '--format', 'jsonl'])
+        assert result.exit_code == 1
+        assert 'Error: --format jsonl can not be used with --boards or ' \
+               '--seeds' in result.output
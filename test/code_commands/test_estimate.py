@@ -0,0 +1,20 @@
+from apio.commands.estimate import cli as cmd_estimate
+
+
+def test_estimate(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_estimate)
+        assert result.exit_code != 0
+        assert 'Info: No apio.ini file' in result.output
+        assert 'Error: insufficient arguments: missing board' in result.output
+
+
+def test_estimate_board(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_estimate, ['--board', 'icezum'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'apio install scons' in result.output
+            assert 'apio install icestorm' in result.output
@@ -0,0 +1,29 @@
+from apio.commands.run import cli as cmd_run
+
+
+def test_run(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_run)
+        assert result.exit_code == 2
+        assert 'Missing argument' in result.output
+
+
+def test_run_targets(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_run, ['build', 'verify'])
+        assert result.exit_code != 0
+        assert 'Info: No apio.ini file' in result.output
+        assert 'Error: insufficient arguments: missing board' in result.output
+
+
+def test_run_board(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_run, [
+            'build', 'time', 'verify', '--board', 'icezum'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'apio install scons' in result.output
+            assert 'apio install icestorm' in result.output
@@ -0,0 +1,9 @@
+from apio.commands.stats import cli as cmd_stats
+
+
+def test_stats(clirunner, validate_cliresult, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_stats)
+        validate_cliresult(result)
+        assert 'Info: no builds recorded' in result.output
@@ -18,3 +18,12 @@ def test_time_board(clirunner, configenv):
         if result.exit_code == 1:
             assert 'apio install scons' in result.output
             assert 'apio install icestorm' in result.output
+
+
+def test_time_json(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_time, ['--board', 'icezum', '--json'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'apio install scons' in result.output
@@ -9,3 +9,12 @@ def test_verify(clirunner, configenv):
         if result.exit_code == 1:
             assert 'apio install scons' in result.output
             assert 'apio install iverilog' in result.output
+
+
+def test_verify_timeout(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_verify, ['--timeout', '60'])
+        assert result.exit_code != 0
+        if result.exit_code == 1:
+            assert 'apio install scons' in result.output
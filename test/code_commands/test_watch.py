@@ -0,0 +1,17 @@
+from apio.commands.watch import cli as cmd_watch
+
+
+def test_watch(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_watch)
+        assert result.exit_code == 2
+        assert 'Missing argument' in result.output
+
+
+def test_watch_target(clirunner, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_watch, ['upload'])
+        assert result.exit_code == 2
+        assert 'Invalid value' in result.output
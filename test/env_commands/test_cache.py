@@ -0,0 +1,22 @@
+from apio.commands.cache import cli as cmd_cache
+
+
+def test_cache(clirunner, validate_cliresult):
+    result = clirunner.invoke(cmd_cache)
+    validate_cliresult(result)
+
+
+def test_cache_stats(clirunner, validate_cliresult, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_cache, ['--stats'])
+        validate_cliresult(result)
+        assert 'Hits: 0, misses: 0' in result.output
+
+
+def test_cache_clean(clirunner, validate_cliresult, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_cache, ['--clean'])
+        validate_cliresult(result)
+        assert 'Build cache cleaned' in result.output
@@ -0,0 +1,7 @@
+from apio.commands.cache_server import cli as cmd_cache_server
+
+
+def test_cache_server(clirunner):
+    result = clirunner.invoke(cmd_cache_server)
+    assert result.exit_code != 0
+    assert 'Missing option "-d" / "--dir"' in result.output
@@ -14,3 +14,8 @@ def test_config_list(clirunner, validate_cliresult):
 def test_config_exe(clirunner, validate_cliresult):
     result = clirunner.invoke(cmd_config, ['--exe', 'native'])
     validate_cliresult(result)
+
+
+def test_config_scons(clirunner, validate_cliresult):
+    result = clirunner.invoke(cmd_config, ['--scons', 'subprocess'])
+    validate_cliresult(result)
@@ -0,0 +1,22 @@
+from apio.commands.env import cli as cmd_env
+
+
+def test_env(clirunner, validate_cliresult):
+    result = clirunner.invoke(cmd_env)
+    validate_cliresult(result)
+
+
+def test_env_list(clirunner, validate_cliresult, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_env, ['--list'])
+        validate_cliresult(result)
+        assert 'not installed' in result.output
+
+
+def test_env_shell(clirunner, validate_cliresult, configenv):
+    with clirunner.isolated_filesystem():
+        configenv()
+        result = clirunner.invoke(cmd_env, ['--shell'])
+        validate_cliresult(result)
+        assert 'PATH' in result.output
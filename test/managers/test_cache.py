@@ -0,0 +1,38 @@
+from os.path import join
+
+from apio.managers.cache import input_key
+
+
+def _project(path):
+    path.join('leds.v').write('module leds(); endmodule\n')
+    path.join('leds.pcf').write('set_io a 1\n')
+    path.mkdir('src').join('top.v').write('module top(); endmodule\n')
+    path.mkdir('.apio').join('sources.json').write('{}')
+    return str(path)
+
+
+def _variables(project_dir, sconstruct):
+    return ['-f', sconstruct, 'fpga_size=1k', 'toolchain=icestorm 1.11',
+            'sources={}'.format(join(project_dir, '.apio', 'sources.json')),
+            'netlist={}'.format(join(project_dir, 'build',
+                                     'hardware.blif'))]
+
+
+def test_input_key_project_dir(tmpdir):
+    # -- Same project and SConstruct in two different dirs
+    sconstructs = []
+    for name in ('a', 'b'):
+        sconstruct = tmpdir.mkdir('resources-' + name).join('SConstruct')
+        sconstruct.write('# SConstruct\n')
+        sconstructs.append(str(sconstruct))
+    first = _project(tmpdir.mkdir('first'))
+    second = _project(tmpdir.mkdir('second').mkdir('nested'))
+    keys = [input_key('build', _variables(project_dir, sconstruct),
+                      project_dir, [join('src', 'top.v')])
+            for project_dir, sconstruct in zip((first, second), sconstructs)]
+    assert keys[0] == keys[1]
+
+    # -- A different SConstruct is a different build
+    tmpdir.join('resources-b', 'SConstruct').write('# Changed\n')
+    assert input_key('build', _variables(second, sconstructs[1]), second,
+                     [join('src', 'top.v')]) != keys[0]
@@ -0,0 +1,47 @@
+import os
+import threading
+
+import pytest
+import requests
+
+from apio.managers.cacheserver import CacheServer, _ThreadingHTTPServer
+
+
+@pytest.fixture
+def server(tmpdir):
+    cache_server = CacheServer(str(tmpdir), 0.01, max_upload=0.005)
+    httpd = _ThreadingHTTPServer(('127.0.0.1', 0), cache_server._handler())
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    cache_server.url = 'http://127.0.0.1:{}'.format(httpd.server_port)
+    yield cache_server
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_cache_server_defaults(tmpdir):
+    cache_server = CacheServer(str(tmpdir), 1)
+    assert cache_server.host == '127.0.0.1'
+    assert cache_server.max_upload == 1024 * 1024
+
+
+def test_cache_server_max_upload(server):
+    url = server.url + '/artifacts/ab/abcdef0123456789'
+    assert requests.put(url, data=b'x' * 6000).status_code == 413
+    assert requests.head(url).status_code == 404
+    assert requests.put(url, data=b'x' * 5000).status_code == 201
+    assert requests.get(url).content == b'x' * 5000
+
+
+def test_cache_server_manifests_quota(server):
+    # -- The quota, 10240 bytes, is shared by the artifacts and manifests
+    for index in range(4):
+        response = requests.put(
+            '{0}/manifests/key{1}'.format(server.url, index),
+            data=b'm' * 3000)
+        assert response.status_code == 201
+    manifests = os.listdir(server.manifests_dir)
+    assert len(manifests) == 3
+    assert 'key0' not in manifests
+    assert requests.get(server.url + '/stats').json()['evictions'] == 1
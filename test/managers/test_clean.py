@@ -0,0 +1,33 @@
+import os
+
+from apio.managers.scons import SCons, add_build_dir, get_build_dirs
+
+
+def test_clean_build_dirs(tmpdir, monkeypatch):
+    outside = tmpdir.mkdir('outside')
+    project = tmpdir.mkdir('project')
+    monkeypatch.chdir(str(project))
+    for path in ('out/hx1k-tq144', 'out/seeds/seed-1', 'out/icestick',
+                 'out/notes', 'out/empty', 'out/hx8k-ct256'):
+        project.join(path).ensure(dir=True)
+    project.join('out', 'hx1k-tq144', 'hardware.asc').write('')
+    project.join('out', 'notes', 'todo.txt').write('')
+    outside.join('hx1k-tq144').ensure(dir=True)
+
+    add_build_dir(os.path.join('out', 'hx1k-tq144'))
+    add_build_dir(os.path.join('out', 'seeds'))
+    add_build_dir(os.path.join(str(project), 'out', 'icestick'))
+    add_build_dir(os.path.join('out', 'seeds'))
+    add_build_dir(str(outside.join('hx1k-tq144')))
+    # -- The project dir and its parents are never recorded
+    add_build_dir('.')
+    add_build_dir('..')
+    assert get_build_dirs() == [
+        os.path.join('out', 'hx1k-tq144'), os.path.join('out', 'seeds'),
+        os.path.join('out', 'icestick'), str(outside.join('hx1k-tq144'))]
+
+    SCons()._clean_build_dirs()
+    assert sorted(os.listdir(str(project.join('out')))) == [
+        'empty', 'hx8k-ct256', 'notes']
+    assert not outside.join('hx1k-tq144').check()
+    assert get_build_dirs() == []
@@ -0,0 +1,88 @@
+import os
+
+from apio.managers import pins as pins_module
+from apio.managers.pins import PinDatabase, ICEPACK, parse_chipdb, \
+    check_pcf
+
+CHIPDB = """\
+.device 1k 14 18 1248
+
+.pins tq144
+1 0 14 1
+2 0 14 0
+44 6 0 1
+78 13 9 0
+112 7 17 0
+
+.pins cm36
+A1 0 13 0
+
+.io_tile 1 0
+"""
+
+
+def _chipdb(tmpdir):
+    path = tmpdir.join('chipdb-1k.txt')
+    path.write(CHIPDB)
+    return str(path)
+
+
+def _pcf(tmpdir, text):
+    path = tmpdir.join('leds.pcf')
+    path.write(text)
+    return str(path)
+
+
+def test_parse_chipdb(tmpdir):
+    packages = parse_chipdb(_chipdb(tmpdir))
+    assert sorted(packages) == ['cm36', 'tq144']
+    # -- Banks: left 3, bottom 2, right 1, top 0
+    assert packages['tq144'] == {
+        '1': [0, 14, 1, 3], '2': [0, 14, 0, 3], '44': [6, 0, 1, 2],
+        '78': [13, 9, 0, 1], '112': [7, 17, 0, 0]}
+
+
+def test_check_pcf(tmpdir):
+    pins = parse_chipdb(_chipdb(tmpdir))['tq144']
+    path = _pcf(tmpdir, """\
+# LEDs
+set_io LED0 1
+set_io -nowarn LED1 112  # comment
+set_io LED2 200
+set_io LED3 1
+set_io LED0 44
+set_io -io_std SB_LVDS_INPUT RX 78
+set_io -io_std SB_LVDS_INPUT RX_OK 2
+set_io LED4
+set_clk clk 44
+""")
+    assert check_pcf(path, pins, 'tq144') == [
+        'leds.pcf:4: unknown pin 200 of the tq144 package',
+        'leds.pcf:5: pin 1 already assigned to port LED0',
+        'leds.pcf:6: port LED0 already assigned to pin 1',
+        'leds.pcf:7: differential input RX on pin 78 of bank 1, only bank '
+        '3 supports SB_LVDS_INPUT',
+        'leds.pcf:9: expected a port and a pin',
+        'leds.pcf:10: unknown command: set_clk']
+
+
+def test_check_pcf_unknown_package(tmpdir):
+    # -- Without the package pins only the syntax is checked
+    path = _pcf(tmpdir, 'set_io LED0 1\nset_io LED1 1\n')
+    assert check_pcf(path, None, 'tq144') == [
+        'leds.pcf:2: pin 1 already assigned to port LED0']
+
+
+def test_pins_system_chipdb(tmpdir, monkeypatch):
+    monkeypatch.setenv('APIO_HOME_DIR', str(tmpdir.mkdir('home')))
+    monkeypatch.setenv('APIO_PKG_DIR', str(tmpdir.join('home', 'packages')))
+    monkeypatch.setattr(pins_module, 'CHIPDB_DIRS', [])
+    # -- icestorm tools of the system, not installed by apio
+    prefix = tmpdir.mkdir('icestorm')
+    prefix.mkdir('bin').join(ICEPACK).write('')
+    _chipdb(prefix.mkdir('share').mkdir('icebox'))
+    monkeypatch.setenv('PATH', os.pathsep.join(
+        [str(prefix.join('bin')), os.environ.get('PATH', '')]))
+    pins = PinDatabase('').get_pins('1k', 'tq144')
+    assert sorted(pins) == ['1', '112', '2', '44', '78']
+    assert PinDatabase('').get_pins('9k', 'tq144') is None
@@ -0,0 +1,83 @@
+import io
+import json
+import os
+
+from apio.managers.renderer import (Renderer, JsonRenderer, KEEP_LOGS,
+                                    LOGS_DIR)
+
+OUTPUT = [
+    (u'Found and reported 0 problems / error-free', 'info'),
+    (u'Info: 0 errors, 0 warnings', 'info'),
+    (u'Removed 2 unused cells: error_flag, warning_led', 'info'),
+    (u'ERROR: Module `ledz\' referenced in module `top\' not found', 'error'),
+    (u'leds.v:3: error: Unknown module type: ledz', 'error'),
+    (u'arachne-pnr: fatal error: unknown chipdb', 'error'),
+    (u'scons: *** [hardware.blif] Error 1', 'error'),
+    (u'Warning: wire \'\\led\' is assigned in a block', 'warning'),
+    (u'leds.v:5: warning: Port 2 of top expects 8 bits', 'warning')
+]
+
+# -- Progress of the tools written to stderr
+PROGRESS = [u'seed: 1', u'place_constraints...', u'promote_globals...']
+
+
+def test_renderer_logs(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    renderers = [Renderer('build', quiet=True) for _ in range(3)]
+    assert len(set(renderer.log_path for renderer in renderers)) == 3
+    renderers[0].on_out(u'Info: áéí')
+    for renderer in renderers:
+        renderer.close(summary=False)
+    with io.open(renderers[0].log_path, encoding='utf-8') as f:
+        assert f.read() == u'Info: áéí\n'
+
+
+def test_renderer_keep_logs(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    logs_dir = tmpdir.join(LOGS_DIR)
+    logs_dir.ensure(dir=True)
+    for index in range(KEEP_LOGS + 5):
+        path = logs_dir.join('build-20200101-0000{0:02}-1.log'.format(index))
+        path.write('')
+        os.utime(str(path), (index, index))
+    logs_dir.join('build-seed-1-20200101-000000-1.log').write('')
+    logs_dir.join('notes.txt').write('')
+
+    renderer = Renderer('build', quiet=True)
+    renderer.close(summary=False)
+    logs = sorted(os.listdir(str(logs_dir)))
+    assert len([name for name in logs if name.startswith('build-2')]) == \
+        KEEP_LOGS
+    assert 'build-20200101-000000-1.log' not in logs
+    assert os.path.basename(renderer.log_path) in logs
+    assert 'build-seed-1-20200101-000000-1.log' in logs
+    assert 'notes.txt' in logs
+
+
+def test_renderer_levels(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    renderer = Renderer('build', quiet=True)
+    for line, _ in OUTPUT:
+        renderer.on_out(line)
+    for line in PROGRESS:
+        renderer.on_err(line)
+    renderer.close(summary=False)
+    assert renderer.errors == 4
+    assert renderer.warnings == 2
+
+
+def test_json_renderer_levels(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    stream = io.StringIO()
+    renderer = JsonRenderer('build', stream)
+    for line, _ in OUTPUT:
+        renderer.on_err(line)
+    for line in PROGRESS:
+        renderer.on_err(line)
+    renderer.result('build', None, 0, 1)
+    renderer.close()
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [event['level'] for event in events[:-1]] == \
+        [level for _, level in OUTPUT] + ['info'] * len(PROGRESS)
+    assert events[-1]['errors'] == 4
+    assert events[-1]['warnings'] == 2
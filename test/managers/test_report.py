@@ -0,0 +1,99 @@
+from apio.managers.report import parse_timing, parse_log, parse_netlist, \
+    parse_stat, parse_packing
+
+LOG = u"""\
+yosys -p "synth_ice40 -blif hardware.blif" leds.v
+=== leds ===
+
+   Number of wires:                 10
+   Number of cells:                 12
+     SB_DFF                          4
+     SB_LUT4                         8
+
+Warning: wire 'x' is used but has no driver
+arachne-pnr -d 1k -P tq144 -o hardware.asc -p leds.pcf hardware.blif
+After packing:
+IOs          3 / 96
+LCs          8 / 1280
+BRAMs        1 / 16
+
+After placement:
+LCs          9 / 1280
+icetime -d hx1k -P tq144 -mtr hardware.rpt hardware.asc
+// Timing estimate: 4.24 ns (235.98 MHz)
+Info: áéí
+"""
+
+
+def _write(tmpdir, name, text):
+    path = tmpdir.join(name)
+    path.write_text(text, 'utf-8')
+    return str(path)
+
+
+def test_parse_timing(tmpdir):
+    path = _write(tmpdir, 'hardware.rpt', u"""\
+Report for critical path:
+-------------------------
+
+        lc40_5_10_2 (LogicCell40) [clk] -> lcout: 0.640 ns
+     0.640 ns net_1 (counter[0])
+
+Total number of logic levels: 3
+Total path delay: 4.24 ns (235.98 MHz)
+""")
+    assert parse_timing(path) == {'delay': 4.24, 'fmax': 235.98}
+    assert parse_timing(_write(tmpdir, 'empty.rpt', u'')) is None
+    assert parse_timing(str(tmpdir.join('missing.rpt'))) is None
+
+
+def test_parse_log(tmpdir):
+    path = _write(tmpdir, 'build.log', LOG)
+    assert parse_log(path) == {'luts': 8, 'brams': 1, 'fmax': 235.98}
+    assert parse_log(_write(tmpdir, 'synth.log', u'yosys\n')) == \
+        {'luts': None, 'brams': None, 'fmax': None}
+    assert parse_log(str(tmpdir.join('missing.log'))) == \
+        {'luts': None, 'brams': None, 'fmax': None}
+
+
+def test_parse_stat(tmpdir):
+    path = _write(tmpdir, 'build.log', LOG)
+    assert parse_stat(path) == {
+        'cells': 12, 'types': {'SB_DFF': 4, 'SB_LUT4': 8}}
+
+
+def test_parse_packing(tmpdir):
+    path = _write(tmpdir, 'build.log', LOG)
+    assert parse_packing(path) == {
+        'ios': {'used': 3, 'available': 96},
+        'lcs': {'used': 8, 'available': 1280},
+        'brams': {'used': 1, 'available': 16}}
+    assert parse_packing(_write(tmpdir, 'synth.log', u'yosys\n')) is None
+
+
+def test_parse_netlist(tmpdir):
+    path = _write(tmpdir, 'hardware.blif', u"""\
+# Generated by Yosys
+.model leds
+.inputs clk rst
+.outputs LED[0] LED[1] \\
+  LED[2]
+.names $false
+.subckt SB_LUT4 I0=a I1=b O=c
+.subckt SB_LUT4 I0=c O=d
+.subckt SB_DFF C=clk D=c Q=e
+.subckt SB_DFFER C=clk D=d E=rst Q=f
+.subckt SB_CARRY CI=a I0=b I1=c CO=g
+.gate SB_RAM40_4K RDATA[0]=h
+.subckt SB_PLL40_CORE REFERENCECLK=clk
+.end
+
+.model sub
+.inputs a b c d
+.outputs e
+.subckt SB_LUT4 I0=a O=e
+.end
+""")
+    assert parse_netlist(path) == {
+        'luts': 3, 'ffs': 2, 'carries': 1, 'brams': 1, 'plls': 1, 'ios': 5}
+    assert parse_netlist(str(tmpdir.join('missing.blif'))) is None
@@ -0,0 +1,115 @@
+import os
+import atexit
+import sys
+import signal
+
+import pytest
+
+from apio.managers.runner import Runner, ListCapture, RingCapture, \
+    isWindows
+
+
+def _python(code):
+    return [sys.executable, '-c', code]
+
+
+def test_ring_capture():
+    capture = RingCapture(3)
+    for n in range(10):
+        capture.append('line {}'.format(n))
+    assert capture.lines() == ['line 7', 'line 8', 'line 9']
+
+    capture = ListCapture()
+    for n in range(10):
+        capture.append('line {}'.format(n))
+    assert len(capture.lines()) == 10
+
+
+def test_job_capture():
+    runner = Runner()
+    job = runner.wait(runner.spawn(_python(
+        'for n in range(10): print("line %d" % n)'), capture=RingCapture(3)))
+    assert job.capture.lines() == ['line 7', 'line 8', 'line 9']
+
+    # -- Nothing is kept by default
+    job = runner.wait(runner.spawn(_python('print("line")')))
+    assert job.capture.lines() == []
+
+
+def test_multiple_jobs():
+    runner = Runner()
+    outputs = {}
+    events = []
+
+    def listener(job, stream, line, timestamp):
+        events.append((job.name, stream))
+
+    for name, code in (('a', 0), ('b', 3), ('c', 0)):
+        out = outputs.setdefault(name, [])
+        runner.spawn(_python(
+            'import sys\n'
+            'for n in range(3): print("{0} %d" % n)\n'
+            'sys.stderr.write("{0} error\\n")\n'
+            'sys.exit({1})'.format(name, code)),
+            outcallback=out.append, listener=listener, name=name)
+    assert len(runner.active) == 3
+
+    finished = []
+    while runner.active:
+        finished += runner.poll(1)
+    assert sorted(job.name for job in finished) == ['a', 'b', 'c']
+    assert dict((job.name, job.returncode) for job in runner.jobs) == \
+        {'a': 0, 'b': 3, 'c': 0}
+    for name in 'abc':
+        assert outputs[name] == ['{0} {1}'.format(name, n) for n in range(3)]
+        assert events.count((name, 'stdout')) == 3
+        assert events.count((name, 'stderr')) == 1
+    assert runner.poll(0) == []
+
+
+def test_job_timeout():
+    runner = Runner()
+    job = runner.spawn(_python('import time\ntime.sleep(30)'), timeout=0.3)
+    runner.wait(job)
+    assert job.timed_out
+    assert job.cancelled
+    assert job.returncode != 0
+    if not isWindows:
+        assert job.returncode == -signal.SIGKILL
+    assert job.elapsed < 10
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_fork_job():
+    runner = Runner()
+    lines = []
+
+    def target():
+        print('forked')
+        sys.exit(2)
+
+    job = runner.wait(runner.fork(target, outcallback=lines.append))
+    assert job.returncode == 2
+    assert lines == ['forked']
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_fork_job_exit_handlers(tmpdir):
+    runner = Runner()
+    lines = []
+    parent = os.getpid()
+    marker = tmpdir.join('handler')
+
+    def handler():
+        if os.getpid() != parent:
+            marker.write('')
+
+    def target():
+        sys.stdout.write('no newline')
+
+    # -- The exit handlers of the parent are not run in the child
+    atexit.register(handler)
+    job = runner.wait(runner.fork(target, outcallback=lines.append))
+    assert job.returncode == 0
+    assert lines == ['no newline']
+    assert not marker.check()
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import hashlib
+from os.path import dirname, join, relpath
+
+import pytest
+
+import apio
+
+SCONSTRUCT = join(dirname(apio.__file__), 'resources', 'SConstruct')
+
+
+@pytest.fixture
+def sconstruct(tmpdir, monkeypatch):
+    """Verilog scanner functions of the SConstruct, on a SCons file system
+       rooted at the tmpdir project"""
+    fs_module = pytest.importorskip('SCons.Node.FS')
+    import SCons.exitfuncs
+    monkeypatch.chdir(str(tmpdir))
+    loaded = []
+
+    def load(build_dir=''):
+        fs = fs_module.FS(str(tmpdir))
+        if build_dir:
+            fs.VariantDir(build_dir, '.', duplicate=0)
+        with open(SCONSTRUCT, 'r') as f:
+            text = f.read()
+        section = text[text.index('# -- Verilog scanner'):
+                       text.index('env.Append(SCANNERS=')]
+        namespace = {'os': os, 're': re, 'json': json, 'SCons': SCons,
+                     'hashlib': hashlib, 'join': join, 'File': fs.File,
+                     'Dir': fs.Dir, 'BUILD_DIR': build_dir, 'fs': fs}
+        exec(compile(section, SCONSTRUCT, 'exec'), namespace)
+        loaded.append(namespace)
+        return namespace
+
+    yield load
+    # -- The scan cache is not saved at exit
+    for namespace in loaded:
+        del namespace['scan_cache_changed'][:]
+
+
+def _write(tmpdir, files):
+    for path, text in files.items():
+        tmpdir.join(path).ensure().write(text)
+
+
+def _scan(sconstruct, path):
+    fs = sconstruct['fs']
+    deps = sconstruct['verilog_scan'](fs.File(path), None, ())
+    return [relpath(dep.abspath, fs.Dir('#').abspath).replace(os.sep, '/')
+            for dep in deps]
+
+
+def test_verilog_scan(tmpdir, sconstruct):
+    _write(tmpdir, {
+        'rtl/top.v': '`include "defs.vh"\n'
+                     '`include "common.vh"\n'
+                     '`include "missing.vh"\n'
+                     '// `include "old.vh"\n'
+                     'module top;\n'
+                     '  initial $readmemh("rom.hex", rom);\n'
+                     '  initial $readmemb( "table.mem" , table);\n'
+                     'endmodule\n',
+        'rtl/defs.vh': '', 'defs.vh': '', 'common.vh': '', 'old.vh': '',
+        'rom.hex': '', 'rtl/rom.hex': '', 'rtl/table.mem': ''})
+    # -- Includes from the dir of the file first, data files from the
+    #    project dir first
+    assert _scan(sconstruct(), 'rtl/top.v') == [
+        'rtl/defs.vh', 'common.vh', 'rom.hex', 'rtl/table.mem']
+
+
+def test_verilog_scan_build_dir(tmpdir, sconstruct):
+    _write(tmpdir, {
+        'top.v': '`include "defs.vh"\nmodule top;\n'
+                 '  initial $readmemh("rom.hex", rom);\nendmodule\n',
+        'defs.vh': '', 'rom.hex': ''})
+    namespace = sconstruct('build/hx1k-tq144')
+    assert _scan(namespace, 'build/hx1k-tq144/top.v') == [
+        'build/hx1k-tq144/defs.vh', 'build/hx1k-tq144/rom.hex']
+    assert namespace['SCAN_CACHE'] == join('build/hx1k-tq144',
+                                           '.verilog.json')
+
+
+def test_verilog_info(tmpdir, sconstruct):
+    _write(tmpdir, {'top.v': """\
+module top(input clk, output [7:0] leds);
+  /* counter unused(.clk(clk)); */
+  counter #(.WIDTH(8)) c0(.clk(clk), .q(leds));
+  counter #( .WIDTH(8) ) c1(.clk(clk));
+  uart u0(.clk(clk));
+  sub s0(.clk(clk));
+  always @(posedge clk) $display("%d", leds);
+endmodule
+
+module sub(input clk);
+endmodule
+"""})
+    namespace = sconstruct()
+    path = str(tmpdir.join('top.v'))
+    info = namespace['verilog_info'](path)
+    assert info['modules'] == ['top', 'sub']
+    assert info['instances'] == ['counter', 'uart']
+    assert info['parameters'] == {'counter': ['.WIDTH(8)'], 'uart': ['']}
+    # -- The parse is cached by the file hash
+    assert namespace['verilog_info'](path) is info
+    tmpdir.join('top.v').write('module other; endmodule\n')
+    assert namespace['verilog_info'](path)['modules'] == ['other']
+
+
+def test_verilog_files(tmpdir, sconstruct):
+    _write(tmpdir, {
+        'top.v': 'module top; a a0(); endmodule\n',
+        'a.v': 'module a; b b0(); endmodule\n',
+        'b.v': 'module b; endmodule\n',
+        'unused.v': 'module unused; endmodule\n',
+        'top_tb.v': 'module top_tb; top t0(); endmodule\n',
+        'defs.v': 'localparam N = 4;\n'})
+    namespace = sconstruct()
+    sources = ['a.v', 'b.v', 'defs.v', 'top.v', 'top_tb.v', 'unused.v']
+    assert namespace['verilog_files'](sources, ['top']) == [
+        'a.v', 'b.v', 'defs.v', 'top.v']
+    assert namespace['verilog_files'](sources, ['top_tb']) == [
+        'a.v', 'b.v', 'defs.v', 'top.v', 'top_tb.v']
+    # -- The leaves and their hierarchy are left out
+    assert namespace['verilog_files'](sources, ['top'], ['a']) == [
+        'defs.v', 'top.v']
+
+
+def test_ooc_modules(tmpdir, sconstruct):
+    _write(tmpdir, {
+        'top.v': """\
+module top(input clk);
+  counter #(.WIDTH(8), .STEP(4'b0001)) c0(.clk(clk));
+  counter #(.WIDTH(8), .STEP(4'b0001)) c1(.clk(clk));
+  blink b0(.clk(clk));
+  uart #(.BAUD(BAUD)) u0(.clk(clk));
+  fifo #(.DEPTH(16)) f0(.clk(clk));
+  fifo #(.DEPTH(32)) f1(.clk(clk));
+  shift #(8) s0(.clk(clk));
+  pair p0(.clk(clk));
+  missing m0(.clk(clk));
+endmodule
+""",
+        'counter.v': 'module counter(input clk); endmodule\n',
+        'blink.v': 'module blink(input clk); endmodule\n',
+        'uart.v': 'module uart(input clk); endmodule\n',
+        'fifo.v': 'module fifo(input clk); endmodule\n',
+        'shift.v': 'module shift(input clk); endmodule\n',
+        'pair.v': 'module pair(input clk); endmodule\n'
+                  'module pair_helper; endmodule\n',
+        'other.v': 'module other; counter #(.WIDTH(8), .STEP(4\'b0001)) '
+                   'c2(.clk(clk)); endmodule\n'})
+    sources = ['blink.v', 'counter.v', 'fifo.v', 'other.v', 'pair.v',
+               'shift.v', 'top.v', 'uart.v']
+    # -- Only the modules alone in their file, with the same constant
+    #    named overrides in all their instances
+    assert sconstruct()['ooc_modules'](sources, 'top') == {
+        'counter': {'WIDTH': '8', 'STEP': "4'b0001"},
+        'blink': {}}
+
+
+def test_ooc_modules_overrides(tmpdir, sconstruct):
+    # -- An instance with other overrides outside of the top
+    _write(tmpdir, {
+        'top.v': 'module top; counter #(.WIDTH(8)) c0(); endmodule\n',
+        'other.v': 'module other; counter #(.WIDTH(4)) c0(); endmodule\n',
+        'counter.v': 'module counter; endmodule\n'})
+    namespace = sconstruct()
+    assert namespace['ooc_modules'](
+        ['counter.v', 'other.v', 'top.v'], 'top') == {}
+    assert namespace['ooc_modules'](['counter.v', 'top.v'], 'top') == {
+        'counter': {'WIDTH': '8'}}
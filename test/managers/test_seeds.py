@@ -0,0 +1,29 @@
+from apio.managers.scons import rank_seeds
+
+
+def _run(seed, fmax=None, opts=''):
+    return {'seed': seed, 'opts': opts,
+            'timing': {'fmax': fmax, 'delay': round(1000.0 / fmax, 2)}
+            if fmax else None}
+
+
+def test_rank_seeds(tmpdir):
+    path = tmpdir.join('seeds', 'report.txt')
+    runs = [_run(1, 180.5), _run(2), _run(3, 220.0, '--post-place-opt'),
+            _run(4, 200.0)]
+    ranked, lines = rank_seeds(runs, str(path))
+    assert [r['seed'] for r in ranked] == [3, 4, 1, 2]
+    assert path.read().splitlines() == lines
+    assert lines[0].split() == ['Rank', 'Seed', 'Fmax', 'Delay', 'Options']
+    assert lines[1].split() == ['1', '3', '220.00', 'MHz', '4.55', 'ns',
+                                '--post-place-opt']
+    assert lines[3].split() == ['3', '1', '180.50', 'MHz', '5.54', 'ns', '-']
+    assert lines[4].split() == ['4', '2', 'ERROR', '-', '-']
+
+
+def test_rank_seeds_failed(tmpdir):
+    ranked, lines = rank_seeds([_run(1), _run(2)],
+                               str(tmpdir.join('report.txt')))
+    assert [r['seed'] for r in ranked] == [1, 2]
+    assert not ranked[0]['timing']
+    assert len(lines) == 3
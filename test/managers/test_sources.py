@@ -0,0 +1,86 @@
+import os
+
+from apio.managers.sources import Sources
+from apio.managers.builddirs import add_build_dir
+
+
+def _project(tmpdir):
+    tmpdir.join('apio.ini').write(
+        '[env]\nboard = icezum\nsources = rtl, lib\n'
+        'include = *.v, *.vh\nexclude = *_tb.v, lib/vendor\n')
+    for path in ('top.v', 'rtl/cpu.v', 'rtl/cpu_tb.v', 'rtl/defs.vh',
+                 'rtl/notes.txt', 'rtl/alu/alu.v', 'rtl/.cache/tmp.v',
+                 'lib/uart.v', 'lib/vendor/pll.v'):
+        tmpdir.join(path).ensure()
+
+
+def test_sources_files(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    _project(tmpdir)
+    sources = Sources()
+    assert sources.enabled
+    assert sources.files() == [
+        'lib/uart.v', 'rtl/alu/alu.v', 'rtl/cpu.v', 'rtl/defs.vh']
+    assert sources.scons_variables() == [
+        'sources={}'.format(sources.path)]
+    assert os.path.isfile(sources.path)
+
+
+def test_sources_cache(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    _project(tmpdir)
+    files = Sources().files()
+
+    # -- The walk is cached while the dirs mtimes do not change
+    alu = tmpdir.join('rtl', 'alu')
+    mtime = alu.mtime()
+    alu.join('shifter.v').ensure()
+    os.utime(str(alu), (mtime, mtime))
+    assert Sources().files() == files
+
+    # -- A changed dir is walked again
+    os.utime(str(alu), (mtime + 10, mtime + 10))
+    assert Sources().files() == [
+        'lib/uart.v', 'rtl/alu/alu.v', 'rtl/alu/shifter.v', 'rtl/cpu.v',
+        'rtl/defs.vh']
+
+    # -- And so are changed options
+    tmpdir.join('apio.ini').write('[env]\nboard = icezum\nsources = lib\n')
+    assert Sources().files() == ['lib/uart.v', 'lib/vendor/pll.v']
+
+
+def test_sources_missing_dir(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    tmpdir.join('apio.ini').write('[env]\nboard = icezum\nsources = rtl\n')
+    assert Sources().scons_variables() is None
+
+
+def test_sources_cache_build(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    tmpdir.join('apio.ini').write(
+        '[env]\nboard = icezum\nexclude = *_tb.v\n')
+    for path in ('top.v', 'top_tb.v', 'rtl/cpu.v', 'build/report.json'):
+        tmpdir.join(path).ensure()
+    tmpdir.join('out', 'hx1k-tq144').ensure(dir=True)
+    add_build_dir(os.path.join('out', 'hx1k-tq144'))
+    files = Sources().files()
+    assert files == ['rtl/cpu.v', 'top.v']
+    data = Sources()._load()
+    assert sorted(data['dirs']) == ['', 'out', 'rtl']
+
+    # -- A build writes its artifacts in the project and the build dirs
+    later = tmpdir.mtime() + 10
+    for path in ('hardware.blif', 'hardware.asc', 'build/report.json',
+                 'out/hx1k-tq144/hardware.asc', 'out/hx1k-tq144/top.v'):
+        tmpdir.join(path).ensure()
+    for path in ('.', 'build', 'out', 'out/hx1k-tq144'):
+        os.utime(str(tmpdir.join(path)), (later, later))
+    sources = Sources()
+    assert sources._load() is not None
+    assert sources.files() == files
+
+    # -- A new source is found
+    tmpdir.join('alu.v').ensure()
+    os.utime(str(tmpdir), (later + 10, later + 10))
+    assert Sources()._load() is None
+    assert Sources().files() == ['alu.v', 'rtl/cpu.v', 'top.v']
@@ -0,0 +1,44 @@
+import json
+import os
+
+from apio.managers.stats import BuildStats, BuildHistory, STATS_DIR
+
+
+def _record(build_stats, tool, wall):
+    with open(build_stats.records_path, 'a') as f:
+        f.write(json.dumps({'tool': tool, 'wall': wall, 'exit_code': 0,
+                            'inputs': {}, 'outputs': {}}) + '\n')
+
+
+def test_build_stats_names(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    builds = [BuildStats(), BuildStats('build-icestick'),
+              BuildStats('build-icezum')]
+    assert len(set(b.records_path for b in builds)) == 3
+    for build_stats in builds:
+        build_stats.scons_variables()
+        _record(build_stats, 'arachne-pnr', 1.5)
+    data = builds[1].update('build', 'icestick', 0, 10, 12)
+    assert data['stages'][0]['stage'] == 'pnr'
+    assert not os.path.isfile(builds[1].records_path)
+    # -- Only the stats of the single build are saved
+    assert sorted(os.listdir(str(tmpdir.join(STATS_DIR)))) == sorted(
+        os.path.basename(b.records_path) for b in (builds[0], builds[2]))
+    builds[0].update('build', 'icestick', 0, 10, 12)
+    assert os.path.isfile(builds[0].last_build_path)
+
+
+def test_build_history(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    history = BuildHistory(str(tmpdir.join('history.db')))
+    report = {'luts': 100, 'brams': 1, 'fmax': None}
+    for index, board in enumerate(['icestick', 'icezum']):
+        build_stats = BuildStats('build-{}'.format(board))
+        build_stats.scons_variables()
+        _record(build_stats, 'yosys', 1.0 + index)
+        history.add(build_stats.update('build', board, index, 10, 12),
+                    report, 'v1')
+    builds = history.get_builds(str(tmpdir))
+    assert [(b['board'], b['exit_code']) for b in builds] == [
+        ('icezum', 1), ('icestick', 0)]
+    assert history._get_stages(builds[0]['id']) == {'synth': 2.0}
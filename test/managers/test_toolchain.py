@@ -0,0 +1,37 @@
+import os
+
+from apio.managers.toolchain import Toolchain
+
+
+def test_toolchain_apply(tmpdir, monkeypatch):
+    monkeypatch.setenv('APIO_HOME_DIR', str(tmpdir))
+    monkeypatch.setenv('PATH', os.pathsep.join(['/usr/bin', '/bin']))
+    toolchain = Toolchain()
+    toolchain.data['path'] = ['/apio/icestorm/bin', '/apio/iverilog/bin']
+    toolchain.data['env'] = {}
+    for _ in range(3):
+        toolchain.apply()
+    assert os.environ['PATH'].split(os.pathsep) == [
+        '/apio/icestorm/bin', '/apio/iverilog/bin', '/usr/bin', '/bin']
+
+    # -- Entries added by another apply are replaced
+    toolchain.data['path'] = ['/apio/icestorm/bin']
+    toolchain.apply()
+    assert os.environ['PATH'].split(os.pathsep) == [
+        '/apio/icestorm/bin', '/usr/bin', '/bin']
+
+
+def test_toolchain_installed_package(tmpdir, monkeypatch):
+    monkeypatch.setenv('APIO_HOME_DIR', str(tmpdir))
+    monkeypatch.setenv('APIO_PKG_DIR', str(tmpdir))
+    assert Toolchain().data['packages']['icestorm']['dir'] == ''
+
+    # -- Installed without apio install
+    package_dir = tmpdir.join('packages', 'toolchain-icestorm')
+    package_dir.join('bin').ensure(dir=True)
+    toolchain = Toolchain()
+    assert toolchain.data['packages']['icestorm']['dir'] == str(package_dir)
+    assert str(package_dir.join('bin')) in toolchain.data['path']
+
+    package_dir.remove()
+    assert Toolchain().data['packages']['icestorm']['dir'] == ''
@@ -0,0 +1,66 @@
+import os
+import time
+
+from platform import system
+
+import pytest
+
+from apio.managers.watcher import Watch, PollingWatcher, InotifyWatcher
+
+
+def _write(path, text='x'):
+    dirname = os.path.dirname(path)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def _watchers(path, build_dir='build'):
+    watchers = [PollingWatcher(path, build_dir, interval=0.05)]
+    if system() == 'Linux':
+        watchers.append(InotifyWatcher(path, build_dir))
+    return watchers
+
+
+def test_watcher_source(tmpdir):
+    path = str(tmpdir)
+    for watcher in _watchers(path):
+        _write(os.path.join(path, 'rtl', 'leds.v'), watcher.name)
+        assert watcher.poll(0.5) == {os.path.join('rtl', 'leds.v')}
+        watcher.close()
+
+
+@pytest.mark.parametrize('build_dir', ['build', 'out'])
+def test_watcher_build_dir(tmpdir, build_dir):
+    path = str(tmpdir)
+    for watcher in _watchers(path, build_dir):
+        _write(os.path.join(path, build_dir, 'report.json'), watcher.name)
+        _write(os.path.join(path, build_dir, 'hx1k-tq144', 'report.json'))
+        _write(os.path.join(path, '.apio', 'sources.json'))
+        _write(os.path.join(path, 'hardware.blif'))
+        assert watcher.poll(0.3) == set()
+        watcher.close()
+
+
+def test_watch_cancel_interval(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    watch = Watch('build', {})
+    watch.watcher.close()
+    watch.watcher = PollingWatcher(str(tmpdir), interval=0.2)
+    scans = []
+    scan = watch.watcher._scan
+    watch.watcher._scan = lambda: scans.append(1) or scan()
+
+    # -- A build tick every 0.01 seconds scans the project once per
+    #    interval
+    pending = set()
+    for _ in range(30):
+        assert not watch._changed(pending)
+        time.sleep(0.01)
+    assert 1 <= len(scans) <= 3
+
+    _write(os.path.join(str(tmpdir), 'leds.v'))
+    time.sleep(0.2)
+    assert watch._changed(pending)
+    assert pending == {'leds.v'}